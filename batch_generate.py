@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Batch HeyGem Generator
+Submits many tasks at once and watches all of them from a single event loop
+
+Usage: python batch_generate.py batch.csv
+CSV columns: code,audio,videos  (videos separated by ';', files live in /nvme0n1-disk/HeyGem)
+"""
+import asyncio
+import csv
+import os
+import sys
+import time
+
+import aiohttp
+
+from file_utils import fast_copy, stat_or_none, wait_until_written
+
+try:
+    from inotify_simple import INotify, flags
+    INOTIFY_AVAILABLE = True
+except ImportError:
+    INOTIFY_AVAILABLE = False
+    print("⚠️  inotify_simple not installed, falling back to polling (pip install inotify_simple)")
+
+# Configuration
+SOURCE_DIR = "/nvme0n1-disk/HeyGem"
+GPU_ID = 0
+GPU_PORT = 8390
+BASE_URL = f"http://127.0.0.1:{GPU_PORT}"
+GPU_DATA_DIR = os.path.expanduser(f"~/heygem_data/gpu{GPU_ID}")
+INPUT_DIR = f"{GPU_DATA_DIR}/face2face"
+OUTPUT_DIR = f"{GPU_DATA_DIR}/temp"
+OUTPUT_SUFFIX = "-r.mp4"
+MAX_CONNECTIONS = 8
+PROGRESS_INTERVAL = 30  # seconds between progress lines
+MAX_WAIT = 3600  # 1 hour for the whole batch
+
+
+def load_batch(path):
+    """Read (code, audio, [videos]) rows from the batch CSV"""
+    with open(path, newline='') as f:
+        return [
+            {
+                "code": row["code"].strip(),
+                "audio": row["audio"].strip(),
+                "videos": [v.strip() for v in row["videos"].split(';') if v.strip()],
+            }
+            for row in csv.DictReader(f)
+        ]
+
+
+def stage_files(batch):
+    """Copy every distinct input file into the GPU data dir once"""
+    names = {task["audio"] for task in batch}
+    for task in batch:
+        names.update(task["videos"])
+    os.makedirs(INPUT_DIR, exist_ok=True)
+    for name in names:
+        fast_copy(f"{SOURCE_DIR}/{name}", INPUT_DIR)
+    return len(names)
+
+
+async def submit(session, task):
+    """Submit one task; returns True on success"""
+    video_urls = [f"/code/data/face2face/{vid}" for vid in task["videos"]]
+    payload = {
+        "audio_url": f"/code/data/face2face/{task['audio']}",
+        "video_url": video_urls[0],
+        "video_urls": video_urls,
+        "code": task["code"],
+        "chaofen": 1,
+        "watermark_switch": 0,
+        "pn": 1
+    }
+    try:
+        async with session.post(f"{BASE_URL}/easy/submit", json=payload) as response:
+            result = await response.json()
+    except Exception as e:
+        print(f"   ❌ {task['code']}: {e}")
+        return False
+
+    if not result.get('success'):
+        print(f"   ❌ {task['code']}: {result}")
+        return False
+    print(f"   ✅ {task['code']} submitted")
+    return True
+
+
+def watch_outputs(loop, done_events):
+    """
+    Single inotify watcher for the whole batch; demuxes `<code>-r.mp4` events to
+    the per-task asyncio.Event. Returns the INotify (or None when polling).
+    """
+    if not INOTIFY_AVAILABLE:
+        return None
+
+    inotify = INotify()
+    inotify.add_watch(OUTPUT_DIR, flags.CLOSE_WRITE | flags.MOVED_TO)
+
+    def on_readable():
+        for event in inotify.read(timeout=0):
+            if event.name.endswith(OUTPUT_SUFFIX):
+                done = done_events.get(event.name[:-len(OUTPUT_SUFFIX)])
+                if done is not None:
+                    done.set()
+
+    loop.add_reader(inotify.fileno(), on_readable)
+    return inotify
+
+
+async def poll_outputs(done_events, interval):
+    """Fallback for when inotify is unavailable (also catches outputs written before we started)"""
+    while True:
+        for code, done in done_events.items():
+            if not done.is_set() and stat_or_none(f"{OUTPUT_DIR}/{code}{OUTPUT_SUFFIX}"):
+                done.set()
+        await asyncio.sleep(interval)
+
+
+async def report_progress(session, done_events, start_time):
+    """Print one progress line per pending task every PROGRESS_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(PROGRESS_INTERVAL)
+        elapsed = int(time.time() - start_time)
+        for code, done in done_events.items():
+            if done.is_set():
+                continue
+            try:
+                async with session.get(f"{BASE_URL}/easy/query", params={"code": code}) as response:
+                    data = (await response.json()).get('data', {})
+                print(f"[{elapsed:4d}s] {code}: {data.get('progress', 0):3d}% | {data.get('msg', '')}")
+            except Exception:
+                print(f"[{elapsed:4d}s] {code}: monitoring...")
+
+
+async def collect(code, done, closed, start_time):
+    """Wait for one task's output and copy it next to the inputs"""
+    await done.wait()
+    output_file = f"{OUTPUT_DIR}/{code}{OUTPUT_SUFFIX}"
+    if closed:
+        output_bytes = os.stat(output_file).st_size
+    else:
+        while True:
+            try:
+                output_bytes = await asyncio.to_thread(wait_until_written, output_file)
+                break
+            except TimeoutError as e:
+                print(f"   ⏳ {code}: {e}, still waiting...")
+
+    output_name = f"output_multi_{code}.mp4"
+    copied_bytes = await asyncio.to_thread(fast_copy, output_file, f"{SOURCE_DIR}/{output_name}")
+    status = "✅" if copied_bytes == output_bytes else "⚠️  size mismatch"
+    print(f"🎉 {code} done in {(time.time() - start_time)/60:.1f} min -> "
+          f"{output_name} ({copied_bytes / (1024 * 1024):.1f} MB) {status}")
+
+
+async def run(batch):
+    loop = asyncio.get_running_loop()
+    start_time = time.time()
+
+    connector = aiohttp.TCPConnector(limit_per_host=MAX_CONNECTIONS)
+    timeout = aiohttp.ClientTimeout(total=30)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        # Watch before submitting so no completion can slip past
+        done_events = {task["code"]: asyncio.Event() for task in batch}
+        inotify = watch_outputs(loop, done_events)
+
+        print(f"\n📤 Submitting {len(batch)} tasks...")
+        results = await asyncio.gather(*[submit(session, task) for task in batch])
+        for task, ok in zip(batch, results):
+            if not ok:
+                del done_events[task["code"]]
+        if not done_events:
+            print("❌ Nothing submitted")
+            return
+
+        print(f"\n⏳ Monitoring {len(done_events)} tasks (Ctrl+C to stop)...\n")
+        background = [asyncio.create_task(report_progress(session, done_events, start_time))]
+        if inotify is None:
+            background.append(asyncio.create_task(poll_outputs(done_events, 5)))
+
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*[
+                    collect(code, done, inotify is not None, start_time)
+                    for code, done in done_events.items()
+                ]),
+                timeout=MAX_WAIT
+            )
+        except asyncio.TimeoutError:
+            pending = [code for code, done in done_events.items() if not done.is_set()]
+            print(f"\n⏰ Max wait time ({MAX_WAIT/60:.0f} min) reached, still running: {', '.join(pending)}")
+        finally:
+            for t in background:
+                t.cancel()
+            if inotify is not None:
+                loop.remove_reader(inotify.fileno())
+                inotify.close()
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+
+    batch = load_batch(sys.argv[1])
+    print("=" * 80)
+    print(f"🎬 HeyGem Batch Generator - {len(batch)} tasks")
+    print("=" * 80)
+
+    print("\n📁 Copying files to GPU data directory...")
+    staged = stage_files(batch)
+    print(f"   ✅ {staged} files copied")
+
+    try:
+        asyncio.run(run(batch))
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Monitoring stopped")
+        print("   Tasks continue in background!")
+
+    print("\n🏁 Done!")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
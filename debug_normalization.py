@@ -1,4 +1,7 @@
 
+import sys
+import timeit
+
 from webapp_chunked.text_normalization import latex_to_speech
 
 text = """Would you like me to solve a problem using this formula, for example: 2x2+5x−3=0​"""
@@ -8,3 +11,9 @@ print("-" * 40)
 normalized = latex_to_speech(text)
 print(f"Normalized: {normalized}")
 print("-" * 40)
+
+# Regression benchmark: python debug_normalization.py [iterations]
+iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+total = timeit.timeit(lambda: latex_to_speech(text), number=iterations)
+print(f"{iterations} calls: {total:.3f}s ({total / iterations * 1e6:.1f} µs/call)")
+print("-" * 40)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+File helpers shared by the HeyGem driver scripts
+Copies stay in-kernel (reflink / copy_file_range / sendfile) instead of forking `cp`
+"""
+import os
+import time
+import errno
+import fcntl
+import hashlib
+import mmap
+import shutil
+import sys
+
+COPY_CHUNK = 4 * 1024 * 1024  # 4 MiB per syscall
+
+# errnos meaning "this fast path is not supported here", try the next one
+_FALLBACK_ERRNOS = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP, errno.ENOTTY}
+
+FICLONE = 0x40049409  # _IOW(0x94, 9, int) from <linux/fs.h>
+
+
+def _reflink(src_fd, dst_fd):
+    # Shares the source extents (btrfs/XFS); no data is copied at all
+    fcntl.ioctl(dst_fd, FICLONE, src_fd)
+    return os.fstat(src_fd).st_size
+
+
+def _copy_file_range(src_fd, dst_fd):
+    copied = 0
+    while True:
+        n = os.copy_file_range(src_fd, dst_fd, COPY_CHUNK)
+        if n == 0:
+            return copied
+        copied += n
+
+
+def _sendfile(src_fd, dst_fd):
+    copied = 0
+    while True:
+        n = os.sendfile(dst_fd, src_fd, copied, COPY_CHUNK)
+        if n == 0:
+            return copied
+        copied += n
+
+
+def _fadvise(fd, advice):
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(fd, 0, 0, getattr(os, advice))
+        except OSError:
+            pass
+
+
+def _copy_fds(fsrc, fdst):
+    src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+    src_size = os.fstat(src_fd).st_size
+    for copy_fn in (sys.platform.startswith('linux') and _reflink,
+                    getattr(os, 'copy_file_range', None) and _copy_file_range,
+                    getattr(os, 'sendfile', None) and _sendfile):
+        if not copy_fn:
+            continue
+        try:
+            copied = copy_fn(src_fd, dst_fd)
+        except OSError as e:
+            # Only fall back if nothing was written yet
+            if e.errno not in _FALLBACK_ERRNOS or os.lseek(dst_fd, 0, os.SEEK_CUR) != 0:
+                raise
+            continue
+        # Some kernels/filesystems report 0 bytes copied instead of failing
+        # (shutil guards against the same thing), so try the next method
+        if copied or not src_size:
+            return copied
+
+    shutil.copyfileobj(fsrc, fdst, COPY_CHUNK)
+    return fdst.tell()
+
+
+def mmap_digest(path):
+    """BLAKE2b-128 of a file, hashed straight from a read-only mapping (no read() copies)"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return hashlib.blake2b(b'', digest_size=16, usedforsecurity=False).hexdigest()
+        with mmap.mmap(f.fileno(), 0, prot=mmap.PROT_READ) as m:
+            return hashlib.blake2b(m, digest_size=16, usedforsecurity=False).hexdigest()
+
+
+def verify_copy(src, dst):
+    """True if dst has exactly the same content as src"""
+    return mmap_digest(src) == mmap_digest(dst)
+
+
+def stat_or_none(path):
+    """One stat syscall in place of os.path.exists + os.path.getsize; None if missing"""
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def fast_copy(src, dst):
+    """
+    Copy src to dst (a file path or a directory, like `cp`).
+    Returns the number of bytes copied so callers can verify against the source size.
+    """
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        src_fd = fsrc.fileno()
+        _fadvise(src_fd, 'POSIX_FADV_SEQUENTIAL')
+        try:
+            return _copy_fds(fsrc, fdst)
+        finally:
+            # One-shot read, don't leave the source sitting in the page cache
+            _fadvise(src_fd, 'POSIX_FADV_DONTNEED')
+
+
+def link_or_copy(src, dst):
+    """
+    Hardlink src to dst (no bytes moved); falls back to fast_copy when the two
+    paths are on different filesystems or the FS does not support links.
+    """
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        fast_copy(src, dst)
+
+
+def wait_until_written(path, settle=1.0, timeout=20, poll=0.2):
+    """
+    Wait for a writer to finish with `path` instead of sleeping a fixed time.
+    The file counts as done once its size (fstat on one fd) has not changed for
+    `settle` seconds. Returns the final size; raises TimeoutError if the file is
+    still changing after `timeout` seconds, so callers never copy a partial file.
+    """
+    deadline = time.time() + timeout
+    with open(path, 'rb') as f:
+        fd = f.fileno()
+        last_size = os.fstat(fd).st_size
+        stable_since = time.time()
+        while True:
+            size = os.fstat(fd).st_size
+            now = time.time()
+            if size != last_size:
+                last_size = size
+                stable_since = now
+            elif now - stable_since >= settle:
+                return size
+
+            if now >= deadline:
+                raise TimeoutError(f"{path} still being written after {timeout}s ({size} bytes)")
+            time.sleep(poll)
@@ -4,16 +4,26 @@ Multi-Video Input Generator
 Uses HeyGem's native support for multiple input videos
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import time
-import subprocess
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from file_utils import fast_copy, stat_or_none, verify_copy, wait_until_written
 
 print("=" * 80)
 print("🎬 HeyGem Multi-Video Input - No More Gesture Loops!")
 print("=" * 80)
 
+# One keep-alive connection for submit + every poll, with retry on transient failures
+session = requests.Session()
+session.headers.update({"Content-Type": "application/json"})
+adapter = HTTPAdapter(pool_connections=2, pool_maxsize=2,
+                      max_retries=Retry(total=3, backoff_factor=0.5))
+session.mount("http://", adapter)
+
 # Configuration
 INPUT_VIDEOS = [
     "input_video02.mp4",
@@ -25,11 +35,15 @@ AUDIO_FILE = "modi.wav"
 GPU_ID = 0
 GPU_PORT = 8390
 TASK_CODE = f"multi_video_{int(time.time())}"
+GPU_DATA_DIR = os.path.expanduser(f"~/heygem_data/gpu{GPU_ID}")
+MB = 1024 * 1024  # bytes
+
 
 print(f"\n📹 Input Videos ({len(INPUT_VIDEOS)} clips):")
 for i, vid in enumerate(INPUT_VIDEOS, 1):
-    if os.path.exists(f"/nvme0n1-disk/HeyGem/{vid}"):
-        size = os.path.getsize(f"/nvme0n1-disk/HeyGem/{vid}") / (1024*1024)
+    st = stat_or_none(f"/nvme0n1-disk/HeyGem/{vid}")
+    if st:
+        size = st.st_size / MB
         print(f"   {i}. {vid} ({size:.1f} MB) ✅")
     else:
         print(f"   {i}. {vid} ❌ NOT FOUND")
@@ -40,18 +54,17 @@ print(f"🔖 Task Code: {TASK_CODE}")
 
 # Copy files to GPU data directory
 print("\n📁 Copying files to GPU data directory...")
-gpu_data_dir = os.path.expanduser("~/heygem_data/gpu0/face2face/")
+gpu_data_dir = f"{GPU_DATA_DIR}/face2face/"
 os.makedirs(gpu_data_dir, exist_ok=True)
 
 try:
-    # Copy all videos
-    for vid in INPUT_VIDEOS:
-        src = f'/nvme0n1-disk/HeyGem/{vid}'
-        if os.path.exists(src):
-            subprocess.run(['cp', src, gpu_data_dir], check=True)
+    # Copy all videos + audio concurrently (copies release the GIL inside the syscall)
+    srcs = [f'/nvme0n1-disk/HeyGem/{vid}' for vid in INPUT_VIDEOS]
+    srcs = [src for src in srcs if os.path.exists(src)]
+    srcs.append(f'/nvme0n1-disk/HeyGem/{AUDIO_FILE}')
     
-    # Copy audio
-    subprocess.run(['cp', f'/nvme0n1-disk/HeyGem/{AUDIO_FILE}', gpu_data_dir], check=True)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(fast_copy, srcs, [gpu_data_dir] * len(srcs)))
     print("   ✅ All files copied successfully")
 except Exception as e:
     print(f"   ❌ Error copying files: {e}")
@@ -74,13 +87,16 @@ payload = {
     "pn": 1
 }
 
+# Serialize once: the same text is printed and sent (session already sets Content-Type)
+body = json.dumps(payload, indent=2)
+
 print(f"\n   Payload:")
-print(json.dumps(payload, indent=2))
+print(body)
 
 try:
-    response = requests.post(
+    response = session.post(
         f"http://127.0.0.1:{GPU_PORT}/easy/submit",
-        json=payload,
+        data=body.encode(),
         timeout=30
     )
     
@@ -101,29 +117,31 @@ except Exception as e:
 
 # Monitor progress
 print("\n⏳ Monitoring progress...")
-print("   💡 Check every 30 seconds (Ctrl+C to stop)\n")
+print("   💡 Checking every 1-30 seconds (Ctrl+C to stop)\n")
 
-output_file = os.path.expanduser(f"~/heygem_data/gpu0/temp/{TASK_CODE}-r.mp4")
+output_file = f"{GPU_DATA_DIR}/temp/{TASK_CODE}-r.mp4"
+# Poll fast while progress is moving, back off (x1.3, capped) while it is not
+MIN_INTERVAL = 1
+MAX_INTERVAL = 30
+BACKOFF = 1.3
+check_interval = MIN_INTERVAL
+last_progress = None
+start_time = time.time()
 elapsed = 0
-check_interval = 30
 
 while True:
     try:
         # Check if output file exists
-        if os.path.exists(output_file):
+        if stat_or_none(output_file):
             # Wait for file write completion
             print("\n⏳ Video file detected! Waiting for complete write...")
-            time.sleep(5)
+            try:
+                output_bytes = wait_until_written(output_file)
+            except TimeoutError as e:
+                print(f"   ⏳ {e}, checking again...")
+                continue
             
-            size1 = os.path.getsize(output_file)
-            time.sleep(2)
-            size2 = os.path.getsize(output_file)
-            
-            if size1 != size2:
-                print("⚠️  File still being written, waiting 10 more seconds...")
-                time.sleep(10)
-            
-            file_size = os.path.getsize(output_file) / (1024 * 1024)
+            file_size = output_bytes / MB
             
             print("\n" + "=" * 80)
             print("✅ MULTI-VIDEO GENERATION COMPLETE!")
@@ -138,12 +156,13 @@ while True:
             output_name = f"output_multi_{TASK_CODE}.mp4"
             print(f"\n📋 Copying to /nvme0n1-disk/HeyGem/{output_name}...")
             
-            import shutil
-            shutil.copy(output_file, f"/nvme0n1-disk/HeyGem/{output_name}")
+            copied_bytes = fast_copy(output_file, f"/nvme0n1-disk/HeyGem/{output_name}")
             
-            copied_size = os.path.getsize(f"/nvme0n1-disk/HeyGem/{output_name}") / (1024 * 1024)
-            if abs(copied_size - file_size) < 0.1:
+            copied_size = copied_bytes / MB
+            if copied_bytes == output_bytes and verify_copy(output_file, f"/nvme0n1-disk/HeyGem/{output_name}"):
                 print(f"✅ Copy verified: {output_name} ({copied_size:.1f} MB)")
+            else:
+                print(f"⚠️  Copy verification failed: {output_name}")
             
             print("\n" + "=" * 80)
             print(f"🎉 Video with VARIED GESTURES ready!")
@@ -153,7 +172,7 @@ while True:
         
         # Check API progress
         try:
-            response = requests.get(
+            response = session.get(
                 f"http://127.0.0.1:{GPU_PORT}/easy/query?code={TASK_CODE}",
                 timeout=10
             )
@@ -162,13 +181,21 @@ while True:
             progress = data.get('progress', 0)
             msg = data.get('msg', '')
             
-            print(f"[{elapsed:4d}s / {elapsed//60:2d}m] Progress: {progress:3d}% | {msg}")
+            elapsed_min = elapsed // 60
+            print(f"[{elapsed:4d}s / {elapsed_min:2d}m] Progress: {progress:3d}% | {msg}")
+            
+            if progress != last_progress:
+                last_progress = progress
+                check_interval = MIN_INTERVAL
+            else:
+                check_interval = min(MAX_INTERVAL, check_interval * BACKOFF)
             
         except Exception as e:
             print(f"[{elapsed:4d}s] Monitoring...")
+            check_interval = min(MAX_INTERVAL, check_interval * BACKOFF)
         
         time.sleep(check_interval)
-        elapsed += check_interval
+        elapsed = int(time.time() - start_time)
         
     except KeyboardInterrupt:
         print(f"\n\n⚠️  Monitoring stopped")
@@ -3,9 +3,18 @@
 Generate Talking Video using HeyGem API
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import time
 
+# One keep-alive connection for submit + every poll, with retry on transient failures
+session = requests.Session()
+session.headers.update({"Content-Type": "application/json"})
+adapter = HTTPAdapter(pool_connections=2, pool_maxsize=2,
+                      max_retries=Retry(total=3, backoff_factor=0.5))
+session.mount("http://", adapter)
+
 # Configuration
 BASE_URL = "http://127.0.0.1:8390"
 #BASE_URL = "http://69.30.204.142:8390"
@@ -38,10 +47,9 @@ payload = {
 }
 
 try:
-    response = requests.post(
+    response = session.post(
         f"{BASE_URL}/easy/submit",
         json=payload,
-        headers={"Content-Type": "application/json"},
         timeout=30
     )
     
@@ -64,12 +72,18 @@ print("\n⏳ Step 2: Monitoring task progress...")
 print("   (This may take a few minutes...)\n")
 
 max_wait = 600  # 10 minutes
-check_interval = 10  # Check every 10 seconds
+# Poll fast while progress is moving, back off (x1.3, capped) while it is not
+MIN_INTERVAL = 1
+MAX_INTERVAL = 30
+BACKOFF = 1.3
+check_interval = MIN_INTERVAL
+last_progress = None
+start_time = time.time()
 elapsed = 0
 
 while elapsed < max_wait:
     try:
-        progress_response = requests.get(
+        progress_response = session.get(
             f"{BASE_URL}/easy/query?code={TASK_CODE}",
             timeout=10
         )
@@ -94,13 +108,20 @@ while elapsed < max_wait:
             print("\n📁 Check output in: /root/heygem_data/face2face/result/")
             break
         
+        if progress != last_progress:
+            last_progress = progress
+            check_interval = MIN_INTERVAL
+        else:
+            check_interval = min(MAX_INTERVAL, check_interval * BACKOFF)
+        
         time.sleep(check_interval)
-        elapsed += check_interval
+        elapsed = int(time.time() - start_time)
         
     except Exception as e:
         print(f"   Error checking progress: {e}")
+        check_interval = min(MAX_INTERVAL, check_interval * BACKOFF)
         time.sleep(check_interval)
-        elapsed += check_interval
+        elapsed = int(time.time() - start_time)
 
 if elapsed >= max_wait:
     print(f"\n⏰ Timeout after {max_wait} seconds")
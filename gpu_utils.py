@@ -0,0 +1,157 @@
+"""
+GPU stats helpers shared by the scheduler and monitoring scripts.
+Reads memory/utilization through NVML (pynvml) when it is installed and falls back
+to parsing nvidia-smi otherwise. GPUSampler (NVML only) collects utilization and
+peak memory in the background between a caller's polls.
+"""
+import atexit
+import re
+import subprocess
+import threading
+
+try:
+    import pynvml
+except ImportError:
+    pynvml = None
+
+MB = 1024 * 1024  # bytes
+
+# One nvidia-smi csv row: index, utilization.gpu, memory.used, memory.total
+_NVSMI_RE = re.compile(r'^\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*$', re.MULTILINE)
+
+_handles = None
+_handles_lock = threading.Lock()
+
+
+def _nvml_handles():
+    """Init NVML once and cache a handle per device ({} when NVML is unavailable)"""
+    global _handles
+    with _handles_lock:
+        if _handles is None:
+            _handles = {}
+            if pynvml is not None:
+                try:
+                    pynvml.nvmlInit()
+                    atexit.register(pynvml.nvmlShutdown)
+                    _handles = {
+                        i: pynvml.nvmlDeviceGetHandleByIndex(i)
+                        for i in range(pynvml.nvmlDeviceGetCount())
+                    }
+                except pynvml.NVMLError:
+                    _handles = {}
+    return _handles
+
+
+def _nvml_stats(handle):
+    mem = pynvml.nvmlDeviceGetMemoryInfo(handle)
+    util = pynvml.nvmlDeviceGetUtilizationRates(handle).gpu
+    return {"utilization": util, "used_mb": mem.used // MB, "total_mb": mem.total // MB}
+
+
+def query_all_gpus():
+    """
+    Current stats for every GPU in one call, as
+    {index: {"utilization": %, "used_mb": int, "total_mb": int}} ({} if unreadable).
+    """
+    handles = _nvml_handles()
+    if handles:
+        try:
+            return {index: _nvml_stats(handle) for index, handle in handles.items()}
+        except pynvml.NVMLError:
+            pass
+
+    # nvidia-smi reports all GPUs in a single invocation
+    try:
+        result = subprocess.run([
+            'nvidia-smi', '--query-gpu=index,utilization.gpu,memory.used,memory.total',
+            '--format=csv,noheader,nounits'
+        ], capture_output=True, text=True, check=True)
+
+        stats = {}
+        for m in _NVSMI_RE.finditer(result.stdout):
+            index, util, used, total = map(int, m.groups())
+            stats[index] = {"utilization": util, "used_mb": used, "total_mb": total}
+        return stats
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return {}
+
+
+def query_gpu(gpu_id):
+    """Current stats for one GPU (see query_all_gpus), or None if the GPU can't be queried"""
+    handle = _nvml_handles().get(gpu_id)
+    if handle is not None:
+        try:
+            return _nvml_stats(handle)
+        except pynvml.NVMLError:
+            pass
+    return query_all_gpus().get(gpu_id)
+
+
+class GPUSampler(threading.Thread):
+    """
+    Background sampler for one GPU. Once per `interval` it drains the driver's
+    utilization sample buffer (nvmlDeviceGetSamples, every sample since the last
+    read) and reads memory, so peaks between a caller's polls are not missed.
+    take() returns the aggregates since the previous take().
+    """
+
+    def __init__(self, gpu_id, interval=1.0):
+        super().__init__(daemon=True)
+        self.handle = _nvml_handles()[gpu_id]
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._util_sum = 0
+        self._util_count = 0
+        self._util_max = 0
+        self._peak_used_mb = 0
+
+    def run(self):
+        last_ts = 0
+        while not self._stop_event.wait(self.interval):
+            try:
+                _, samples = pynvml.nvmlDeviceGetSamples(
+                    self.handle, pynvml.NVML_GPU_UTILIZATION_SAMPLES, last_ts)
+            except pynvml.NVMLError:
+                samples = []  # NVML_ERROR_NOT_FOUND: nothing new since last_ts
+            try:
+                used_mb = pynvml.nvmlDeviceGetMemoryInfo(self.handle).used // MB
+            except pynvml.NVMLError:
+                used_mb = 0
+
+            with self._lock:
+                for sample in samples:
+                    util = sample.sampleValue.uiVal
+                    self._util_sum += util
+                    self._util_count += 1
+                    self._util_max = max(self._util_max, util)
+                    last_ts = max(last_ts, sample.timeStamp)
+                self._peak_used_mb = max(self._peak_used_mb, used_mb)
+
+    def take(self):
+        """{"util_avg", "util_max", "samples", "peak_used_mb"} since the last take()"""
+        with self._lock:
+            count = self._util_count
+            result = {
+                "util_avg": round(self._util_sum / count, 1) if count else None,
+                "util_max": self._util_max,
+                "samples": count,
+                "peak_used_mb": self._peak_used_mb
+            }
+            self._reset()
+        return result
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def start_sampler(gpu_id, interval=1.0):
+    """Start a GPUSampler for gpu_id; None when NVML (or that GPU) is unavailable"""
+    if gpu_id not in _nvml_handles():
+        return None
+    sampler = GPUSampler(gpu_id, interval)
+    sampler.start()
+    return sampler
@@ -0,0 +1,429 @@
+"""
+HeyGem Task Monitor
+Watches a running task until its output video appears, then copies and verifies it.
+
+Modes:
+    simple   - one status line per tick (GPU stats + artifact counts)
+    progress - single-line progress bar estimated from generated frames
+
+Usage: python -m heygem_monitor TASK_CODE [--mode simple|progress] [--frames N | --media FILE]
+"""
+import time
+import os
+import sys
+import argparse
+import threading
+import subprocess
+from collections import deque
+from datetime import datetime
+from types import SimpleNamespace
+
+import requests
+
+from file_utils import fast_copy, stat_or_none, verify_copy, wait_until_written
+from gpu_utils import query_gpu
+
+try:
+    from inotify_simple import INotify, flags
+    INOTIFY_AVAILABLE = True
+except ImportError:
+    INOTIFY_AVAILABLE = False
+    print("⚠️  inotify_simple not installed, falling back to polling (pip install inotify_simple)")
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Configuration
+GPU_INDEX = 0
+OUTPUT_DIR = "/root/heygem_data/gpu0/temp"
+COPY_DIR = "/nvme0n1-disk/HeyGem"
+API_URL = "http://127.0.0.1:8390/easy/query"
+API_INTERVAL = 10  # seconds between /easy/query calls
+MB = 1024 * 1024  # bytes
+MB_PER_GB = 1024.0
+
+# Estimate total frames based on audio/video length (frames = duration * fps)
+ESTIMATED_TOTAL_FRAMES = 10000
+FPS = 25
+RATE_WINDOW = 30  # (elapsed, avi_count) samples kept for the rate fit
+
+_BAR_FULL = '█'.encode()
+_BAR_EMPTY = '░'.encode()
+_STATUS_PREFIX = '\r🎥 '.encode()
+
+
+def get_gpu_stats():
+    """Get GPU utilization (%) and memory (MB); None if unavailable"""
+    stats = query_gpu(GPU_INDEX)
+    if stats is None:
+        return None
+    return stats["utilization"], stats["used_mb"]
+
+
+_file_counts = {}  # dir -> (mtime_ns, count)
+
+
+def count_files(directory, ext):
+    """Count files with `ext` in directory; rescans only when the dir mtime changes"""
+    try:
+        mtime = os.stat(directory).st_mtime_ns
+    except OSError:
+        return 0
+    cached = _file_counts.get(directory)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    count = 0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            count += entry.name.endswith(ext)
+    _file_counts[directory] = (mtime, count)
+    return count
+
+
+def count_temp_artifacts(temp_dir):
+    """Count AVI/PNG files in temp_dir and one level of subdirs; None if unreadable"""
+    avi_count = png_count = 0
+    try:
+        with os.scandir(temp_dir) as entries:
+            subdirs = []
+            for entry in entries:
+                name = entry.name
+                avi_count += name.endswith('.avi')
+                png_count += name.endswith('.png')
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+
+        for subdir in subdirs:
+            with os.scandir(subdir) as entries:
+                for entry in entries:
+                    name = entry.name
+                    avi_count += name.endswith('.avi')
+                    png_count += name.endswith('.png')
+    except OSError:
+        return None
+    return avi_count, png_count
+
+
+def get_media_frames(path):
+    """Expected frame count for a media file: ffprobe duration * FPS"""
+    result = subprocess.run([
+        'ffprobe', '-v', 'quiet',
+        '-show_entries', 'format=duration',
+        '-of', 'csv=p=0',
+        path
+    ], capture_output=True, text=True, check=True)
+    return int(float(result.stdout.strip()) * FPS)
+
+
+def estimate_finish_time(samples, expected_total):
+    """
+    Fit avi_count(t) over the recent samples (order-2 polynomial, linear without numpy)
+    and solve for the time the count reaches expected_total. None until there is a trend.
+    """
+    if len(samples) < 3:
+        return None
+    times, counts = zip(*samples)
+    if counts[-1] <= counts[0]:
+        return None
+
+    if np is None:
+        rate = (counts[-1] - counts[0]) / (times[-1] - times[0])
+        return times[-1] + (expected_total - counts[-1]) / rate
+
+    coefs = np.polyfit(times, counts, deg=2)
+    coefs[-1] -= expected_total
+    future = [r.real for r in np.roots(coefs) if abs(r.imag) < 1e-9 and r.real >= times[-1]]
+    return min(future) if future else None
+
+
+def format_time(seconds):
+    """Format seconds to MM:SS"""
+    mins = int(seconds // 60)
+    secs = int(seconds % 60)
+    return f"{mins:02d}:{secs:02d}"
+
+
+def create_progress_bar(percentage, width=40):
+    """Create visual progress bar (UTF-8 bytes, written straight to stdout's buffer)"""
+    filled = int(width * percentage / 100)
+    return b"[" + _BAR_FULL * filled + _BAR_EMPTY * (width - filled) + b"]"
+
+
+class TaskMonitor:
+    def __init__(self, task_code: str, mode: str = 'progress', check_interval: float = 5,
+                 max_wait: float = 1800, expected_frames: int = None):
+        if mode not in ('simple', 'progress'):
+            raise ValueError(f"Unknown monitor mode: {mode}")
+
+        self.task_code = task_code
+        self.mode = mode
+        self.check_interval = check_interval
+        self.max_wait = max_wait
+        self.expected_frames = expected_frames or ESTIMATED_TOTAL_FRAMES
+
+        self.output_name = f"{task_code}-r.mp4"
+        self.output_path = f"{OUTPUT_DIR}/{self.output_name}"
+        self.avi_dir = f"{OUTPUT_DIR}/{task_code}/avi"
+        self.png_dir = f"{OUTPUT_DIR}/{task_code}/png"
+        self.api_url = f"{API_URL}?code={task_code}"
+
+        # Shared state: watcher threads update it and notify, the main thread only redraws
+        self.state = SimpleNamespace(done=False, closed=False, changed=False,
+                                     gpu=None, files=None, api_progress=None)
+        self.cond = threading.Condition()
+        self.stop = threading.Event()
+
+        # Progress-mode bookkeeping
+        self.progress = 0
+        self.last_avi_count = 0
+        self.samples = deque(maxlen=RATE_WINDOW)
+
+    def update_state(self, **fields):
+        with self.cond:
+            for name, value in fields.items():
+                setattr(self.state, name, value)
+            self.state.changed = True
+            self.cond.notify_all()
+
+    def wait_for_output(self, inotify, timeout):
+        """
+        Block up to `timeout` seconds for the output file.
+        Returns (found, closed): closed is True when the kernel reported the writer closed it.
+        """
+        if inotify is None:
+            time.sleep(timeout)
+            return stat_or_none(self.output_path) is not None, False
+
+        deadline = time.time() + timeout
+        remaining = timeout
+        while remaining > 0:
+            for event in inotify.read(timeout=int(remaining * 1000)):
+                if event.name == self.output_name and event.mask & (flags.CLOSE_WRITE | flags.MOVED_TO):
+                    return True, True
+            remaining = deadline - time.time()
+        return False, False
+
+    def output_watcher(self, inotify):
+        """Flag completion as soon as the output file is written"""
+        while not self.stop.is_set():
+            found, closed = self.wait_for_output(inotify, self.check_interval)
+            if found:
+                self.update_state(done=True, closed=closed)
+                return
+
+    def count_files(self):
+        if self.mode == 'simple':
+            return count_temp_artifacts(OUTPUT_DIR)
+        try:
+            return count_files(self.avi_dir, '.avi'), count_files(self.png_dir, '.png')
+        except OSError:
+            return 0, 0
+
+    def stats_sampler(self):
+        """Sample GPU stats and frame counts every check_interval seconds"""
+        while not self.stop.is_set():
+            self.update_state(gpu=get_gpu_stats(), files=self.count_files())
+            self.stop.wait(self.check_interval)
+
+    def api_watcher(self):
+        """Track the server-reported progress for the task"""
+        session = requests.Session()
+        while not self.stop.is_set():
+            try:
+                data = session.get(self.api_url, timeout=10).json().get('data', {})
+                self.update_state(api_progress=data.get('progress'))
+            except Exception:
+                pass
+            self.stop.wait(API_INTERVAL)
+
+    def print_header(self):
+        print("=" * 80)
+        if self.mode == 'simple':
+            print("🔍 HeyGem Task Monitor - File-based Progress")
+        else:
+            print("🎬 HeyGem Video Generation Monitor - Real-time Progress")
+        print("=" * 80)
+        print(f"Task Code: {self.task_code}")
+        if self.mode == 'simple':
+            print(f"Watching: {self.output_path}")
+        else:
+            print(f"Expected frames: {self.expected_frames:,}")
+        print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print("=" * 80)
+
+    def print_simple_status(self, elapsed, gpu, files):
+        if gpu is None:
+            gpu_stats = "GPU stats unavailable"
+        else:
+            gpu_stats = f"GPU {GPU_INDEX}: {gpu[0]}% util, {gpu[1] / MB_PER_GB:.1f} GB"
+        temp_info = "N/A" if files is None else f"AVIs: {files[0]}, PNGs: {files[1]}"
+        print(f"[{int(elapsed):4d}s] {gpu_stats} | {temp_info} | Waiting for output...")
+
+    def print_progress_status(self, elapsed, gpu, files, api_progress):
+        gpu_util, gpu_mem = gpu or (0, 0)
+        avi_count, png_count = files or (0, 0)
+
+        # Fit the frame rate over recent samples and extrapolate the finish time
+        if avi_count > 0 and (not self.samples or elapsed - self.samples[-1][0] >= self.check_interval / 2):
+            self.samples.append((elapsed, avi_count))
+        finish_time = estimate_finish_time(self.samples, self.expected_frames)
+
+        # Progress: share of the predicted run time, else share of expected frames;
+        # never moves backwards and holds at 95% until the output file appears
+        if finish_time:
+            estimate = elapsed / finish_time
+        else:
+            estimate = avi_count / self.expected_frames
+        self.progress = max(self.progress, min(95, int(estimate * 100)))
+
+        # Print single-line status with percentage: one write + one flush
+        gpu_mem_gb = gpu_mem / MB_PER_GB
+        status = (f" {self.progress:3d}%  |  "
+                  f"⏱️  {format_time(elapsed)}  |  "
+                  f"GPU: {gpu_util:3d}% / {gpu_mem_gb:.1f}GB  |  "
+                  f"Files: {avi_count:,} AVI, {png_count:,} PNG  ")
+        if api_progress is not None:
+            status += f"|  API: {api_progress}%  "
+        sys.stdout.flush()  # keep ordering with earlier print() output
+        sys.stdout.buffer.write(_STATUS_PREFIX + create_progress_bar(self.progress) + status.encode())
+        sys.stdout.buffer.flush()
+
+        # New line when significant progress made
+        if avi_count > self.last_avi_count + 100:
+            print()  # New line for readability
+            self.last_avi_count = avi_count
+
+    def finish(self, elapsed, closed):
+        """Report the finished output, copy it to COPY_DIR and verify the copy"""
+        # CLOSE_WRITE means the writer is done; otherwise wait for the size to settle
+        if closed:
+            output_bytes = os.stat(self.output_path).st_size
+        else:
+            print("\n⏳ Video file detected! Waiting for the writer to finish...")
+            while True:
+                try:
+                    output_bytes = wait_until_written(self.output_path)
+                    break
+                except TimeoutError as e:
+                    print(f"   ⏳ {e}, still waiting...")
+
+        file_size = output_bytes / MB
+
+        print("\n" + "=" * 80)
+        print("✅ VIDEO GENERATION COMPLETE!")
+        print("=" * 80)
+        print(f"📁 Location: {self.output_path}")
+        print(f"📊 Size: {file_size:.1f} MB")
+        print(f"⏱️  Total time: {format_time(elapsed)}")
+        print("=" * 80)
+
+        # Copy to main directory with verification
+        copy_path = f"{COPY_DIR}/output_{self.task_code}.mp4"
+        print(f"📋 Copying complete file...")
+        copied_bytes = fast_copy(self.output_path, copy_path)
+
+        # Verify copy: byte count the kernel reported, then content checksum
+        copied_size = copied_bytes / MB
+        if copied_bytes != output_bytes:
+            print(f"⚠️  Copy size mismatch! Original: {file_size:.1f} MB, Copied: {copied_size:.1f} MB")
+        elif not verify_copy(self.output_path, copy_path):
+            print(f"⚠️  Copy checksum mismatch! {copy_path}")
+        else:
+            print(f"✅ Copied successfully: {copy_path} ({copied_size:.1f} MB)")
+        print("=" * 80)
+
+    def run(self):
+        self.print_header()
+
+        # Watch the temp dir so completion wakes us immediately instead of on the next poll
+        inotify = None
+        if INOTIFY_AVAILABLE:
+            inotify = INotify()
+            try:
+                inotify.add_watch(OUTPUT_DIR, flags.CREATE | flags.CLOSE_WRITE | flags.MOVED_TO)
+            except OSError as e:
+                # e.g. the output dir doesn't exist yet: poll for the file instead
+                print(f"⚠️  Can't watch {OUTPUT_DIR} ({e}), falling back to polling")
+                inotify.close()
+                inotify = None
+
+        if stat_or_none(self.output_path) is not None:
+            self.state.done = True
+            self.state.changed = True
+
+        watchers = [(self.output_watcher, (inotify,)), (self.stats_sampler, ())]
+        if self.mode == 'progress':
+            watchers.append((self.api_watcher, ()))
+        for target, args in watchers:
+            threading.Thread(target=target, args=args, daemon=True).start()
+
+        start_time = time.time()
+        elapsed = 0
+
+        print("\n⏳ Monitoring (Ctrl+C to stop)...\n")
+
+        try:
+            while elapsed < self.max_wait:
+                # Sleep until a watcher reports something (or the time budget runs out)
+                with self.cond:
+                    self.cond.wait_for(lambda: self.state.changed, timeout=self.max_wait - elapsed)
+                    self.state.changed = False
+                    done, closed = self.state.done, self.state.closed
+                    gpu, files = self.state.gpu, self.state.files
+                    api_progress = self.state.api_progress
+                elapsed = time.time() - start_time
+
+                if done:
+                    self.finish(elapsed, closed)
+                    break
+
+                if self.mode == 'simple':
+                    self.print_simple_status(elapsed, gpu, files)
+                else:
+                    self.print_progress_status(elapsed, gpu, files, api_progress)
+
+            if elapsed >= self.max_wait:
+                print(f"\n\n⏰ Max wait time ({self.max_wait/60:.0f} min) reached")
+                print("   Task may still be processing in background")
+
+        except KeyboardInterrupt:
+            print("\n\n⚠️  Monitoring stopped by user")
+            print(f"   Elapsed: {format_time(elapsed)}")
+            print("   Task continues in background")
+
+        self.stop.set()
+        if inotify is not None:
+            inotify.close()
+
+        print("\n🏁 Monitor completed!")
+        print("=" * 80)
+
+
+def monitor(task_code: str, mode: str = 'progress', check_interval: float = 5,
+            max_wait: float = 1800, expected_frames: int = None):
+    """Monitor one HeyGem task until its output appears (see module docstring for modes)"""
+    TaskMonitor(task_code, mode, check_interval, max_wait, expected_frames).run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='heygem_monitor', description='HeyGem task monitor')
+    parser.add_argument('task_code', help='Task code passed to /easy/submit')
+    parser.add_argument('--mode', choices=['simple', 'progress'], default='progress',
+                        help='Display mode (default: progress)')
+    parser.add_argument('--interval', type=float, default=5,
+                        help='Seconds between GPU/file samples (default: 5)')
+    parser.add_argument('--max-wait', type=float, default=1800,
+                        help='Give up after this many seconds (default: 1800)')
+    parser.add_argument('--frames', type=int, help='Expected total frames for the task')
+    parser.add_argument('--media', help='Input audio/video; its duration * FPS seeds the frame estimate')
+    args = parser.parse_args(argv)
+
+    expected_frames = args.frames
+    if not expected_frames and args.media:
+        expected_frames = get_media_frames(args.media)
+
+    monitor(args.task_code, args.mode, args.interval, args.max_wait, expected_frames)
+    return 0
@@ -0,0 +1,5 @@
+import sys
+
+from heygem_monitor import main
+
+sys.exit(main())
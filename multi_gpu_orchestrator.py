@@ -7,227 +7,404 @@ Usage:
     python3 multi_gpu_orchestrator.py --video face.mp4 --text "Your text" --output result.mp4
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import subprocess
 import time
 import os
+import io
+import mmap
+import re
+import struct
 import argparse
+import logging
+import sys
 from pathlib import Path
 from typing import List, Dict, Tuple
-import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor
 import json
+import uuid
 from datetime import datetime
 import psutil
+from file_utils import fast_copy, link_or_copy
+
+try:
+    from inotify_simple import INotify, flags
+    INOTIFY_AVAILABLE = True
+except ImportError:
+    INOTIFY_AVAILABLE = False
+
+# /easy/query polling backs off from MIN to MAX (seconds) until the task completes
+MIN_POLL_INTERVAL = 0.25
+MAX_POLL_INTERVAL = 2.0
+
+# Optional shared-memory status a worker may publish per task: uint32 progress,
+# uint32 status (+ 8 reserved bytes). monitor_task falls back to HTTP without it
+STATUS_SHM_PATH = "/dev/shm/heygem_task_{code}.status"
+STATUS_STRUCT = struct.Struct("II")
+
+# Messages take lazy %-style args, so a record below the level (--quiet) is never
+# formatted; warnings and errors still show with --quiet
+logger = logging.getLogger("orch")
+
+# GPU used for the optional NVENC re-encode in merge_videos
+MERGE_GPU = 0
+
+TTS_URL = "http://127.0.0.1:18180/tts"
+# A failed TTS call falls back to gTTS, so it gets few retries of its own
+TTS_RETRIES = 1
+# gTTS fallback: text is split at sentence ends into at most GTTS_WORKERS pieces
+# (each <= GTTS_CHUNK_CHARS) that are synthesized concurrently
+GTTS_CHUNK_CHARS = 5000
+GTTS_WORKERS = 4
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+# Chunk boundaries snap to the nearest pause within this window of the equal split
+SILENCE_FILTER = "silencedetect=n=-30dB:d=0.05"
+SILENCE_WINDOW = 1.0  # seconds
+SILENCE_RE = re.compile(r"silence_(start|end): (-?[\d.]+)")
+
+
+def open_status_map(task_code: str):
+    """Map a task's shared-memory status file read-only, or None if the worker has not published one"""
+    try:
+        with open(STATUS_SHM_PATH.format(code=task_code), 'rb') as f:
+            return mmap.mmap(f.fileno(), STATUS_STRUCT.size, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+
+def split_text(text: str, limit: int) -> List[str]:
+    """Group sentences into pieces of at most `limit` characters (a longer sentence stays whole)"""
+    pieces = []
+    current = ''
+    for sentence in SENTENCE_END_RE.split(text.strip()):
+        if current and len(current) + 1 + len(sentence) > limit:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
 
 class MultiGPUOrchestrator:
     def __init__(self, verbose=True):
         self.verbose = verbose
+        if not logger.handlers:
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s", datefmt="%H:%M:%S"))
+            logger.addHandler(handler)
+            logger.propagate = False
+        logger.setLevel(logging.INFO if verbose else logging.WARNING)
         self.gpu_ports = {
             0: 8390,
             1: 8391,
             2: 8392
         }
-        self.gpu_status = {0: 'free', 1: 'free', 2: 'free'}
+        # GPUs ready for a task; monitor_task hands its GPU back on completion
+        self.free_gpus = queue.SimpleQueue()
+        for gpu_id in self.gpu_ports:
+            self.free_gpus.put(gpu_id)
         self.data_dirs = {
             0: '/root/heygem_data/gpu0/face2face',
             1: '/root/heygem_data/gpu1/face2face',
             2: '/root/heygem_data/gpu2/face2face'
         }
-        self.lock = threading.Lock()
+        self._dur_cache = {}  # (path, mtime_ns) -> seconds
+        
+        # Keep-alive pool shared by TTS, submit and every monitor thread
+        self.session = requests.Session()
+        self.session.headers.update({"Connection": "keep-alive"})
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16,
+                              max_retries=Retry(total=5, backoff_factor=0.3))
+        self.session.mount("http://", adapter)
+        # Longest matching prefix wins, so TTS calls use their own adapter
+        self.session.mount(TTS_URL, HTTPAdapter(max_retries=Retry(total=TTS_RETRIES, backoff_factor=0.3)))
+        
+        # Decide once whether the local TTS service is up instead of paying its
+        # timeout on every call
+        self.tts_available = self._probe_tts()
     
-    def log(self, message: str):
-        """Print log message with timestamp"""
-        if self.verbose:
-            timestamp = datetime.now().strftime('%H:%M:%S')
-            print(f"[{timestamp}] {message}")
+    def _probe_tts(self) -> bool:
+        """Quick health check of the local TTS service (any HTTP answer counts as up)"""
+        try:
+            requests.head(TTS_URL, timeout=2)
+            return True
+        except requests.RequestException:
+            return False
     
     def text_to_audio(self, text: str, output_file: str) -> float:
         """
         Convert text to audio using TTS
         Returns: audio duration in seconds
         """
-        self.log(f"🎤 Generating audio from text ({len(text)} characters)...")
+        logger.info("🎤 Generating audio from text (%s characters)...", len(text))
         
-        # Try HeyGem TTS service first
-        try:
-            tts_url = "http://127.0.0.1:18180/tts"
+        tts_done = False
+        if self.tts_available:
             payload = {"text": text, "output_path": output_file}
-            
-            response = requests.post(tts_url, json=payload, timeout=60)
-            if response.status_code == 200:
-                with open(output_file, 'wb') as f:
-                    f.write(response.content)
-                self.log("   ✅ TTS service used")
-            else:
-                raise Exception("TTS service failed")
-                
-        except Exception as e:
-            # Fallback: Use gTTS (Google TTS)
-            self.log("   ⚠️  TTS service unavailable, using gTTS fallback...")
-            tts_start = time.time()
             try:
-                from gtts import gTTS
-                # Save as MP3 first (gTTS default format)
-                temp_mp3 = output_file.replace('.wav', '_temp.mp3')
-                # Using tld='co.uk' for British accent (deeper/more masculine)
-                # slow=False for normal speed (sounds more natural)
-                tts = gTTS(text=text, lang='en', tld='co.uk', slow=False)
-                tts.save(temp_mp3)
-                
-                # Convert MP3 to WAV format
-                subprocess.run([
-                    'ffmpeg', '-y', '-i', temp_mp3,
-                    '-ar', '16000', '-ac', '1',
-                    output_file
-                ], capture_output=True, check=True)
-                
-                # Clean up temp MP3
-                if os.path.exists(temp_mp3):
-                    os.remove(temp_mp3)
-                    
-            except ImportError:
-                self.log("   ⚠️  gTTS not available, using espeak...")
-                # Final fallback: espeak
-                subprocess.run([
-                    'espeak', text, '--stdout', '|',
-                    'ffmpeg', '-i', '-', '-ar', '16000', '-ac', '1', output_file
-                ], shell=True, check=True)
+                response = self.session.post(TTS_URL, json=payload, timeout=60)
+            except requests.RequestException as e:
+                logger.warning("   ⚠️  TTS service failed (%s), using gTTS fallback...", e)
+            else:
+                if response.status_code == 200:
+                    with open(output_file, 'wb') as f:
+                        f.write(response.content)
+                    logger.info("   ✅ TTS service used")
+                    tts_done = True
+                else:
+                    logger.warning("   ⚠️  TTS service failed (%s), using gTTS fallback...", response.status_code)
+        else:
+            logger.warning("   ⚠️  TTS service unavailable, using gTTS fallback...")
+        if not tts_done:
+            self.fallback_tts(text, output_file)
         
         # Get duration
         duration = self.get_audio_duration(output_file)
-        self.log(f"   ✅ Audio generated: {duration:.1f} seconds ({duration/60:.1f} minutes)")
+        logger.info("   ✅ Audio generated: %.1f seconds (%.1f minutes)", duration, duration/60)
         return duration
     
+    def fallback_tts(self, text: str, output_file: str):
+        """gTTS (pieces synthesized in parallel), or espeak if gTTS is not installed"""
+        try:
+            from gtts import gTTS
+        except ImportError:
+            logger.warning("   ⚠️  gTTS not available, using espeak...")
+            # Final fallback: espeak, its WAV piped straight into ffmpeg
+            espeak = subprocess.Popen(['espeak', text, '--stdout'], stdout=subprocess.PIPE)
+            subprocess.run([
+                'ffmpeg', '-y', '-i', 'pipe:0', '-ar', '16000', '-ac', '1', output_file
+            ], stdin=espeak.stdout, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            espeak.stdout.close()
+            espeak.wait()
+            return
+        
+        def synthesize(piece: str) -> bytes:
+            # Using tld='co.uk' for British accent (deeper/more masculine)
+            # slow=False for normal speed (sounds more natural)
+            buf = io.BytesIO()
+            gTTS(text=piece, lang='en', tld='co.uk', slow=False).write_to_fp(buf)
+            return buf.getvalue()
+        
+        pieces = split_text(text, min(GTTS_CHUNK_CHARS, -(-len(text) // GTTS_WORKERS)))
+        with ThreadPoolExecutor(max_workers=GTTS_WORKERS) as executor:
+            # MP3 frames concatenate cleanly, so the pieces can simply be joined
+            mp3_data = b''.join(executor.map(synthesize, pieces))
+        
+        # Convert MP3 to WAV format, fed over stdin so no temp MP3 touches disk
+        subprocess.run([
+            'ffmpeg', '-y', '-i', 'pipe:0',
+            '-ar', '16000', '-ac', '1',
+            output_file
+        ], input=mp3_data, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    
     def get_audio_duration(self, audio_file: str) -> float:
-        """Get audio duration using ffprobe"""
+        """Get audio duration using ffprobe (cached per path + mtime)"""
+        key = (audio_file, os.stat(audio_file).st_mtime_ns)
+        if key in self._dur_cache:
+            return self._dur_cache[key]
+        
         cmd = [
             'ffprobe', '-v', 'error',
             '-show_entries', 'format=duration',
             '-of', 'default=noprint_wrappers=1:nokey=1',
             audio_file
         ]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        return float(result.stdout.strip())
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True)
+        duration = self._dur_cache[key] = float(result.stdout.strip())
+        return duration
     
-    def split_audio(self, audio_file: str, num_chunks: int) -> List[str]:
-        """Split audio into equal chunks"""
-        self.log(f"✂️  Splitting audio into {num_chunks} chunks...")
+    def find_silences(self, audio_file: str) -> List[float]:
+        """Return the midpoints of all pauses ffmpeg's silencedetect finds in the file"""
+        cmd = ['ffmpeg', '-i', audio_file, '-af', SILENCE_FILTER, '-f', 'null', '-']
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        
+        centers = []
+        start = None
+        for kind, value in SILENCE_RE.findall(result.stderr):
+            if kind == 'start':
+                start = max(0.0, float(value))
+            elif start is not None:
+                centers.append((start + float(value)) / 2)
+                start = None
+        return centers
+    
+    def split_audio(self, audio_file: str, num_chunks: int, duration: float = None) -> List[str]:
+        """
+        Split audio into roughly equal chunks (one ffmpeg pass with the segment muxer).
+        Each cut moves to the nearest pause within SILENCE_WINDOW of the equal split
+        so no chunk starts or ends mid-word.
+        """
+        logger.info("✂️  Splitting audio into %s chunks...", num_chunks)
         
-        duration = self.get_audio_duration(audio_file)
+        if duration is None:
+            duration = self.get_audio_duration(audio_file)
         chunk_duration = duration / num_chunks
+        silences = self.find_silences(audio_file) if num_chunks > 1 else []
+        
+        cuts = []
+        for i in range(1, num_chunks):
+            ideal = i * chunk_duration
+            nearby = [t for t in silences if abs(t - ideal) <= SILENCE_WINDOW]
+            cuts.append(min(nearby, key=lambda t: abs(t - ideal)) if nearby else ideal)
         
         base_name = audio_file.rsplit('.', 1)[0]
-        output_files = []
+        # Explicit cut points rather than -segment_time, so rounding can never
+        # produce a tiny extra chunk at the end
+        cut_points = ','.join(f"{t:.3f}" for t in cuts)
         
-        for i in range(num_chunks):
-            start_time = i * chunk_duration
-            output = f"{base_name}_chunk{i+1:02d}.wav"
-            
-            cmd = [
-                'ffmpeg', '-y', '-i', audio_file,
-                '-ss', str(start_time),
-                '-t', str(chunk_duration),
-                '-c', 'copy',
-                output
-            ]
-            subprocess.run(cmd, capture_output=True, check=True)
-            output_files.append(output)
-            self.log(f"   Chunk {i+1}/{num_chunks}: {chunk_duration:.1f}s → {output}")
+        cmd = [
+            'ffmpeg', '-y', '-i', audio_file,
+            '-f', 'segment',
+            '-segment_times', cut_points,
+            '-segment_start_number', '1',
+            '-c', 'copy',
+            f"{base_name}_chunk%02d.wav"
+        ]
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        
+        output_files = [f"{base_name}_chunk{i+1:02d}.wav" for i in range(num_chunks)]
+        bounds = [0.0, *cuts, duration]
+        for i, output in enumerate(output_files):
+            logger.info("   Chunk %s/%s: %.1fs → %s", i+1, num_chunks, bounds[i+1] - bounds[i], output)
         
         return output_files
     
     def get_free_gpu(self) -> int:
-        """Get next free GPU, wait if all busy"""
-        while True:
-            with self.lock:
-                for gpu_id, status in self.gpu_status.items():
-                    if status == 'free':
-                        self.gpu_status[gpu_id] = 'reserved'
-                        return gpu_id
-            
-            self.log("⏳ All GPUs busy, waiting 10 seconds...")
-            time.sleep(10)
+        """Get next free GPU, blocks until one is handed back if all are busy"""
+        try:
+            return self.free_gpus.get_nowait()
+        except queue.Empty:
+            logger.info("⏳ All GPUs busy, waiting for one to finish...")
+            return self.free_gpus.get()
     
-    def submit_task(self, gpu_id: int, video_file: str, audio_file: str, task_code: str) -> Dict:
-        """Submit task to specific GPU"""
+    def stage_video(self, gpu_id: int, video_file: str, run_id: str) -> str:
+        """Copy the face video into a GPU's data dir once per run, returns the file name"""
+        data_dir = self.data_dirs[gpu_id]
+        os.makedirs(data_dir, exist_ok=True)
+        
+        video_name = f"video_{run_id}.mp4"
+        link_or_copy(video_file, f"{data_dir}/{video_name}")
+        return video_name
+    
+    def submit_task(self, gpu_id: int, video_name: str, audio_file: str, task_code: str) -> Dict:
+        """Submit task to specific GPU (video_name must already be staged in its data dir)"""
         port = self.gpu_ports[gpu_id]
         data_dir = self.data_dirs[gpu_id]
         
         # Create directory if not exists
         os.makedirs(data_dir, exist_ok=True)
         
-        # Copy files to GPU's data directory
-        video_dest = f"{data_dir}/video_{task_code}.mp4"
+        # Link audio chunk into GPU's data directory
         audio_dest = f"{data_dir}/audio_{task_code}.wav"
-        
-        subprocess.run(['cp', video_file, video_dest], check=True)
-        subprocess.run(['cp', audio_file, audio_dest], check=True)
+        link_or_copy(audio_file, audio_dest)
         
         # Submit task
         url = f"http://127.0.0.1:{port}/easy/submit"
         payload = {
             "audio_url": f"/code/data/face2face/audio_{task_code}.wav",
-            "video_url": f"/code/data/face2face/video_{task_code}.mp4",
+            "video_url": f"/code/data/face2face/{video_name}",
             "code": task_code,
             "chaofen": 0,
             "watermark_switch": 0,
             "pn": 1
         }
         
-        response = requests.post(url, json=payload, timeout=30)
+        response = self.session.post(url, json=payload, timeout=30)
         result = response.json()
         
         if result.get('success'):
-            with self.lock:
-                self.gpu_status[gpu_id] = 'busy'
-            self.log(f"✅ Task '{task_code}' → GPU {gpu_id} (Port {port})")
+            logger.info("✅ Task '%s' → GPU %s (Port %s)", task_code, gpu_id, port)
         else:
-            self.log(f"❌ Failed to submit task '{task_code}' to GPU {gpu_id}")
+            logger.error("❌ Failed to submit task '%s' to GPU %s", task_code, gpu_id)
         
         return result
     
     def monitor_task(self, gpu_id: int, task_code: str) -> str:
-        """Monitor task until completion, returns output file path"""
+        """
+        Monitor task until completion, returns output file path.
+        Completion comes from the task's status (status 2 or progress 100), read from
+        its /dev/shm status map when the worker publishes one and from /easy/query
+        otherwise, so no stat() crosses the container bind mount. Queries back off from
+        MIN_POLL_INTERVAL to MAX_POLL_INTERVAL, and an inotify watch on the GPU temp
+        dir cuts the wait short when the server writes the output.
+        """
         port = self.gpu_ports[gpu_id]
         url = f"http://127.0.0.1:{port}/easy/query?code={task_code}"
+        temp_dir = os.path.normpath(f"{self.data_dirs[gpu_id]}/../temp")
+        output_path = f"{temp_dir}/{task_code}-r.mp4"
         
-        self.log(f"⏳ Monitoring GPU {gpu_id} - Task '{task_code}'...")
+        logger.info("⏳ Monitoring GPU %s - Task '%s'...", gpu_id, task_code)
+        
+        inotify = None
+        if INOTIFY_AVAILABLE:
+            try:
+                os.makedirs(temp_dir, exist_ok=True)
+                inotify = INotify()
+                inotify.add_watch(temp_dir, flags.CLOSE_WRITE | flags.MOVED_TO)
+            except OSError as e:
+                logger.warning("   ⚠️  inotify unavailable (%s), polling GPU %s instead", e, gpu_id)
+                if inotify is not None:
+                    inotify.close()
+                inotify = None
         
         start_time = time.time()
         last_progress = -1
+        interval = MIN_POLL_INTERVAL
+        status_map = None
         
-        while True:
-            try:
-                response = requests.get(url, timeout=10)
-                data = response.json()
-                
-                task_data = data.get('data', {})
-                progress = task_data.get('progress', 0)
-                
-                # Log progress changes
-                if progress != last_progress and progress > 0:
-                    elapsed = time.time() - start_time
-                    self.log(f"   GPU {gpu_id}: {progress}% ({elapsed:.0f}s elapsed)")
-                    last_progress = progress
-                
-                # Check if complete by looking for output file
-                # Fixed: correct path includes parent 'temp' directory
-                output_path = f"{self.data_dirs[gpu_id]}/../temp/{task_code}-r.mp4"
-                if os.path.exists(output_path):
-                    elapsed = time.time() - start_time
-                    with self.lock:
-                        self.gpu_status[gpu_id] = 'free'
-                    self.log(f"✅ GPU {gpu_id} task '{task_code}' complete! ({elapsed:.0f}s)")
-                    return output_path
+        try:
+            while True:
+                try:
+                    if status_map is None:
+                        status_map = open_status_map(task_code)
+                    if status_map is not None:
+                        progress, status = STATUS_STRUCT.unpack_from(status_map, 0)
+                    else:
+                        task_data = self.session.get(url, timeout=10).json().get('data', {})
+                        progress = task_data.get('progress', 0)
+                        status = task_data.get('status')
+                    
+                    if status == 2 or progress >= 100:
+                        elapsed = time.time() - start_time
+                        self.free_gpus.put(gpu_id)
+                        logger.info("✅ GPU %s task '%s' complete! (%.0fs)", gpu_id, task_code, elapsed)
+                        return output_path
+                    
+                    # Log progress changes
+                    if progress != last_progress and progress > 0:
+                        elapsed = time.time() - start_time
+                        logger.info("   GPU %s: %s%% (%.0fs elapsed)", gpu_id, progress, elapsed)
+                        last_progress = progress
+                    
+                except Exception as e:
+                    # Ignore network errors, keep retrying
+                    pass
                 
-            except Exception as e:
-                # Ignore network errors, keep retrying
-                pass
-            
-            time.sleep(10)
+                if inotify is not None:
+                    # Returns early on any write in temp/; the query above decides
+                    inotify.read(timeout=int(interval * 1000))
+                else:
+                    time.sleep(interval)
+                interval = min(MAX_POLL_INTERVAL, interval * 2)
+        finally:
+            if inotify is not None:
+                inotify.close()
+            if status_map is not None:
+                status_map.close()
     
-    def merge_videos(self, video_files: List[str], output_file: str):
-        """Merge multiple video chunks using GPU-accelerated FFmpeg"""
-        self.log(f"🎬 Merging {len(video_files)} video chunks with GPU acceleration...")
+    def merge_videos(self, video_files: List[str], output_file: str, reencode: bool = False):
+        """
+        Merge multiple video chunks in a single ffmpeg pass over the concat list.
+        The chunks come out of the same pipeline with identical codec parameters, so
+        by default they are stream-copied; reencode=True runs one GPU-resident
+        NVDEC → NVENC pass instead (falls back to stream copy if NVENC fails).
+        """
+        logger.info("🎬 Merging %s video chunks...", len(video_files))
         
         # Create temporary file list for ffmpeg
         list_file = '/tmp/heygem_video_list.txt'
@@ -235,62 +412,43 @@ class MultiGPUOrchestrator:
             for video in video_files:
                 f.write(f"file '{video}'\n")
         
-        self.log(f"   Using NVIDIA hardware encoding (NVENC)...")
+        concat_input = ['-f', 'concat', '-safe', '0', '-i', list_file]
+        cmd_copy = ['ffmpeg', '-y', *concat_input, '-c', 'copy', output_file]
         
-        # GPU-accelerated merge using NVENC
-        # First concat with demuxer (fast, no re-encoding), then re-encode with GPU if needed
-        temp_concat = output_file.replace('.mp4', '_temp_concat.mp4')
-        
-        # Step 1: Fast concat without re-encoding
-        cmd_concat = [
-            'ffmpeg', '-y',
-            '-f', 'concat',
-            '-safe', '0',
-            '-i', list_file,
-            '-c', 'copy',
-            temp_concat
-        ]
-        
-        self.log(f"   Step 1/2: Concatenating chunks...")
-        result = subprocess.run(cmd_concat, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            self.log(f"❌ Concat failed: {result.stderr}")
-            raise Exception("Video concatenation failed")
-        
-        # Step 2: GPU re-encode for optimal quality (optional, can skip for speed)
-        # Using h264_nvenc for NVIDIA GPU encoding
-        self.log(f"   Step 2/2: GPU encoding final video...")
-        cmd_encode = [
-            'ffmpeg', '-y',
-            '-hwaccel', 'cuda',  # Use CUDA hardware acceleration
-            '-i', temp_concat,
-            '-c:v', 'h264_nvenc',  # NVIDIA hardware encoder
-            '-preset', 'fast',  # Encoding speed preset
-            '-b:v', '3M',  # Video bitrate
-            '-c:a', 'copy',  # Copy audio without re-encoding
-            output_file
-        ]
-        
-        result = subprocess.run(cmd_encode, capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            self.log(f"✅ GPU-accelerated merge complete: {output_file}")
-            # Clean up temp file
-            if os.path.exists(temp_concat):
-                os.remove(temp_concat)
-        else:
-            # Fallback: if GPU encoding fails, use the concat version
-            self.log(f"⚠️  GPU encoding failed, using concatenated version")
-            if os.path.exists(temp_concat):
-                os.rename(temp_concat, output_file)
-                self.log(f"✅ Fallback merge complete: {output_file}")
-            else:
+        try:
+            if reencode:
+                logger.info("   Using NVIDIA hardware encoding (NVENC)...")
+                cmd_encode = [
+                    'ffmpeg', '-y',
+                    # One CUDA context shared by NVDEC decode and NVENC encode
+                    '-init_hw_device', f'cuda=gpu:{MERGE_GPU}',
+                    '-filter_hw_device', 'gpu',
+                    '-hwaccel', 'cuda',  # Decode on the GPU...
+                    '-hwaccel_device', 'gpu',
+                    '-hwaccel_output_format', 'cuda',  # ...and keep frames there for NVENC
+                    *concat_input,
+                    '-c:v', 'h264_nvenc',  # NVIDIA hardware encoder
+                    '-preset', 'p4',
+                    '-rc', 'vbr',
+                    '-b:v', '3M',  # Video bitrate
+                    '-c:a', 'copy',  # Copy audio without re-encoding
+                    output_file
+                ]
+                result = subprocess.run(cmd_encode, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                if result.returncode == 0:
+                    logger.info("✅ GPU-accelerated merge complete: %s", output_file)
+                    return
+                logger.warning("⚠️  GPU encoding failed, falling back to stream copy")
+            
+            result = subprocess.run(cmd_copy, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            if result.returncode != 0:
+                logger.error("❌ Concat failed: %s", result.stderr)
                 raise Exception("Video merge failed completely")
-        
-        os.remove(list_file)
+            logger.info("✅ Merge complete: %s", output_file)
+        finally:
+            os.remove(list_file)
     
-    def process(self, video_file: str, text: str, output_file: str):
+    def process(self, video_file: str, text: str, output_file: str, reencode: bool = False):
         """
         Main orchestration function
         Handles the complete workflow from text to final merged video
@@ -305,8 +463,18 @@ class MultiGPUOrchestrator:
         print(f"⏰ Start Time: {start_datetime}")
         print("=" * 80)
         
+        # Stage the face video on every GPU in the background while TTS runs,
+        # so the copies are off the critical path
+        run_id = str(int(start_time))
+        stager = ThreadPoolExecutor(max_workers=len(self.data_dirs))
+        staged_videos = {
+            gpu_id: stager.submit(self.stage_video, gpu_id, video_file, run_id)
+            for gpu_id in self.data_dirs
+        }
+        stager.shutdown(wait=False)
+        
         # Step 1: Generate audio from text
-        self.log("\n📝 Step 1: Text to Audio Conversion")
+        logger.info("\n📝 Step 1: Text to Audio Conversion")
         audio_file = '/tmp/generated_audio.wav'
         duration = self.text_to_audio(text, audio_file)
         
@@ -316,63 +484,47 @@ class MultiGPUOrchestrator:
         num_chunks = 3
         strategy = "3 GPUs parallel (forced distribution)"
         
-        self.log(f"\n📊 Step 2: Distribution Strategy")
-        self.log(f"   Audio duration: {duration_minutes:.2f} minutes ({duration:.1f} seconds)")
-        self.log(f"   Strategy: {strategy}")
-        self.log(f"   Chunks: {num_chunks}")
-        self.log(f"   Each GPU: ~{duration/num_chunks:.1f} seconds")
+        logger.info("\n📊 Step 2: Distribution Strategy")
+        logger.info("   Audio duration: %.2f minutes (%.1f seconds)", duration_minutes, duration)
+        logger.info("   Strategy: %s", strategy)
+        logger.info("   Chunks: %s", num_chunks)
+        logger.info("   Each GPU: ~%.1f seconds", duration/num_chunks)
         
         # Step 3: Split audio into 3 chunks
-        self.log(f"\n✂️  Step 3: Audio Preparation")
-        self.log(f"   Splitting audio into {num_chunks} equal chunks...")
-        audio_chunks = self.split_audio(audio_file, num_chunks)
+        logger.info("\n✂️  Step 3: Audio Preparation")
+        logger.info("   Splitting audio into %s equal chunks...", num_chunks)
+        audio_chunks = self.split_audio(audio_file, num_chunks, duration=duration)
         
         # Step 4: Process each chunk in parallel
-        self.log(f"\n🎬 Step 4: Parallel Video Generation ({num_chunks} tasks)")
+        logger.info("\n🎬 Step 4: Parallel Video Generation (%s tasks)", num_chunks)
         
-        tasks = []
-        output_videos = []
+        # One monitor worker per GPU; futures are kept in chunk order
+        monitors = ThreadPoolExecutor(max_workers=len(self.gpu_ports))
+        futures = []
         
         for i, audio_chunk in enumerate(audio_chunks):
             # Get free GPU (waits if all busy)
             gpu_id = self.get_free_gpu()
-            task_code = f"chunk_{i+1:02d}_{int(time.time())}"
-            
-            # Submit task
-            self.submit_task(gpu_id, video_file, audio_chunk, task_code)
+            task_code = f"chunk_{i+1:02d}_{uuid.uuid4().hex[:8]}"
             
-            # Start monitoring in background thread
-            def monitor_wrapper(gpu, code, index):
-                output = self.monitor_task(gpu, code)
-                with self.lock:
-                    output_videos.append((index, output))
+            # Submit task (waits for this GPU's video copy if it is still running)
+            self.submit_task(gpu_id, staged_videos[gpu_id].result(), audio_chunk, task_code)
             
-            thread = threading.Thread(
-                target=monitor_wrapper,
-                args=(gpu_id, task_code, i)
-            )
-            thread.start()
-            tasks.append(thread)
-            
-            # Small delay to avoid race conditions
-            time.sleep(1)
+            # Start monitoring in the background
+            futures.append(monitors.submit(self.monitor_task, gpu_id, task_code))
         
         # Step 5: Wait for all tasks to complete
-        self.log(f"\n⏳ Step 5: Waiting for all {num_chunks} tasks to complete...")
-        for thread in tasks:
-            thread.join()
-        
-        # Sort videos by chunk index
-        output_videos.sort(key=lambda x: x[0])
-        sorted_videos = [v[1] for v in output_videos]
+        logger.info("\n⏳ Step 5: Waiting for all %s tasks to complete...", num_chunks)
+        with monitors:
+            sorted_videos = [f.result() for f in futures]
         
         # Step 6: Merge if multiple chunks
-        self.log(f"\n🎞️  Step 6: Final Video Assembly")
+        logger.info("\n🎞️  Step 6: Final Video Assembly")
         if num_chunks > 1:
-            self.merge_videos(sorted_videos, output_file)
+            self.merge_videos(sorted_videos, output_file, reencode=reencode)
         else:
-            subprocess.run(['cp', sorted_videos[0], output_file], check=True)
-            self.log(f"✅ Video copied to: {output_file}")
+            fast_copy(sorted_videos[0], output_file)
+            logger.info("✅ Video copied to: %s", output_file)
         
         # Calculate total time and get system stats
         total_time = time.time() - start_time
@@ -417,6 +569,11 @@ def main():
         required=True,
         help='Output video file path'
     )
+    parser.add_argument(
+        '--reencode',
+        action='store_true',
+        help='Re-encode the merged video with NVENC instead of stream-copying chunks'
+    )
     parser.add_argument(
         '--quiet', '-q',
         action='store_true',
@@ -434,7 +591,7 @@ def main():
     orchestrator = MultiGPUOrchestrator(verbose=not args.quiet)
     
     try:
-        orchestrator.process(args.video, args.text, args.output)
+        orchestrator.process(args.video, args.text, args.output, reencode=args.reencode)
         return 0
     except Exception as e:
         print(f"\n❌ Error: {e}")
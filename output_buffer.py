@@ -0,0 +1,61 @@
+"""
+Batched stdout for the scheduler test scripts.
+buffer_stdout() swaps sys.stdout for a RingBufferedStdout, so the script's prints and
+the scheduler's own prints share one buffer (and keep their order). The buffer is a
+deque(maxlen=N) written out in one call when it fills, every `interval` seconds (so a
+hung run still shows its progress) and at exit.
+"""
+import atexit
+import sys
+import threading
+from collections import deque
+
+
+class RingBufferedStdout:
+    """File-like stdout stand-in that writes its pending chunks out in batches"""
+
+    def __init__(self, stream, maxlen: int = 256, interval: float = 1.0):
+        self._stream = stream
+        self._chunks = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_every, args=(interval,), daemon=True)
+        self._flusher.start()
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            if len(self._chunks) == self._chunks.maxlen:
+                self._flush_locked()  # write out rather than let the ring drop the oldest
+            self._chunks.append(text)
+        return len(text)
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """Stop the periodic flusher and write out what is left"""
+        self._stop.set()
+        self.flush()
+
+    def _flush_locked(self):
+        if self._chunks:
+            self._stream.write("".join(self._chunks))
+            self._chunks.clear()
+        self._stream.flush()
+
+    def _flush_every(self, interval: float):
+        while not self._stop.wait(interval):
+            self.flush()
+
+    def __getattr__(self, name):
+        # encoding, isatty(), fileno() ... come from the real stream
+        return getattr(self._stream, name)
+
+
+def buffer_stdout(maxlen: int = 256, interval: float = 1.0) -> RingBufferedStdout:
+    """Route sys.stdout through a RingBufferedStdout until exit"""
+    buffered = RingBufferedStdout(sys.stdout, maxlen, interval)
+    sys.stdout = buffered
+    atexit.register(buffered.close)
+    return buffered
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 """
 Quick Start Guide: Add Your Videos Here
-Edit the 'tasks' list below with your video/audio file paths
+Edit VIDEO / AUDIO below with your video/audio file paths
 """
 from smart_gpu_scheduler import GPUScheduler
+import os
 import time
 
 def main():
@@ -18,74 +19,30 @@ def main():
     # ========================================
     # 📝 EDIT THIS SECTION - Add Your Videos
     # ========================================
-    tasks = [
-        # Task 1
-        {
-            "video": "/nvme0n1-disk/HeyGem/input_video02.mp4",      # <-- Your video path
-            "audio": "/nvme0n1-disk/HeyGem/modi.wav",     # <-- Your audio path
-            "name": f"video1_{timestamp}"                         # <-- Unique name
-        },
-        
-        # Task 2
-        {
-            "video": "/nvme0n1-disk/HeyGem/input_video02.mp4",
-            "audio": "/nvme0n1-disk/HeyGem/modi.wav",
-            "name": f"video2_{timestamp}"
-        },
-        
-        # Task 3
-        {
-            "video": "/nvme0n1-disk/HeyGem/input_video02.mp4",
-            "audio": "/nvme0n1-disk/HeyGem/modi.wav",
-            "name": f"video3_{timestamp}"
-        },
-        
-        # Task 4
-        {
-            "video": "/nvme0n1-disk/HeyGem/input_video02.mp4",
-            "audio": "/nvme0n1-disk/HeyGem/modi.wav",
-            "name": f"video4_{timestamp}"
-        },
-        
-        # Task 5
-        {
-            "video": "/nvme0n1-disk/HeyGem/input_video02.mp4",
-            "audio": "/nvme0n1-disk/HeyGem/modi.wav",
-            "name": f"video5_{timestamp}"
-        },
-        
-        # Task 6
-        {
-            "video": "/nvme0n1-disk/HeyGem/input_video02.mp4",
-            "audio": "/nvme0n1-disk/HeyGem/modi.wav",
-            "name": f"video6_{timestamp}"
-        }
-    ]
+    VIDEO = "/nvme0n1-disk/HeyGem/input_video02.mp4"   # <-- Your video path
+    AUDIO = "/nvme0n1-disk/HeyGem/modi.wav"            # <-- Your audio path
+    NUM_VIDEOS = 6
     # ========================================
     # End of configuration
     # ========================================
     
-    # Verify files
-    import os
+    # Verify files (once - every task shares the same inputs)
     print("\n📁 Checking files...")
-    valid_tasks = []
-    for i, task in enumerate(tasks, 1):
-        v_exists = os.path.exists(task["video"])
-        a_exists = os.path.exists(task["audio"])
-        if v_exists and a_exists:
-            valid_tasks.append(task)
-            print(f"  ✅ Task {i} ({task['name']}): Ready")
-        else:
-            print(f"  ❌ Task {i} ({task['name']}): Missing files!")
-            if not v_exists:
-                print(f"     Video not found: {task['video']}")
-            if not a_exists:
-                print(f"     Audio not found: {task['audio']}")
-    
-    if not valid_tasks:
-        print("\n❌ No valid tasks found! Please check file paths.")
+    missing = [path for path in (VIDEO, AUDIO) if not os.path.exists(path)]
+    if missing:
+        for path in missing:
+            print(f"  ❌ Not found: {path}")
+        print("\n❌ Missing input files! Please check file paths.")
         return
     
+    # Unique name per task
+    valid_tasks = [
+        {"video": VIDEO, "audio": AUDIO, "name": f"video{i}_{timestamp}"}
+        for i in range(1, NUM_VIDEOS + 1)
+    ]
+    for i, task in enumerate(valid_tasks, 1):
+        print(f"  ✅ Task {i} ({task['name']}): Ready")
+    
     print(f"\n✅ {len(valid_tasks)} tasks ready to process")
     print("\n" + "="*80)
     print("🔄 GPU Assignment Strategy:")
@@ -4,11 +4,31 @@ Single GPU Video Generation with Performance Tracking
 Tracks: Total time, GPU memory usage, system stats
 """
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import gzip
 import time
-import subprocess
 import os
+from collections import deque
 from datetime import datetime
+from gpu_utils import query_gpu, start_sampler
+from file_utils import fast_copy, link_or_copy, wait_until_written
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from inotify_simple import INotify, flags
+    INOTIFY_AVAILABLE = True
+except ImportError:
+    INOTIFY_AVAILABLE = False
+
+# Keep-alive pool for every /easy/submit and /easy/query call
+session = requests.Session()
+session.headers.update({"Connection": "keep-alive"})
+session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=32, pool_block=False))
 
 # Configuration
 VIDEO_FILE = "input_video02.mp4"
@@ -17,6 +37,8 @@ GPU_ID = 2
 GPU_PORT = 8392
 TASK_CODE = f"perf_test_{int(time.time())}"
 STATS_FILE = f"performance_stats_{TASK_CODE}.json"
+SNAPSHOTS_FILE = f"performance_stats_{TASK_CODE}.ndjson.gz"  # one GPU snapshot per line
+RECENT_SNAPSHOTS = 60  # kept in memory for the recent-peak figure
 
 print("=" * 80)
 print("🎬 HeyGem Single GPU Performance Test")
@@ -25,7 +47,7 @@ print(f"📹 Video: {VIDEO_FILE}")
 print(f"🎤 Audio: {AUDIO_FILE}")
 print(f"🔖 Task Code: {TASK_CODE}")
 print(f"🎯 GPU ID: {GPU_ID}")
-print(f"📊 Stats File: {STATS_FILE}")
+print(f"📊 Stats File: {STATS_FILE} (+ {SNAPSHOTS_FILE})")
 print("=" * 80)
 
 # Performance tracking
@@ -35,32 +57,47 @@ stats = {
     "audio_file": AUDIO_FILE,
     "gpu_id": GPU_ID,
     "start_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-    "gpu_snapshots": []
+    "peak_memory_used_gb": 0,
+    "snapshots_file": SNAPSHOTS_FILE,
+    "snapshot_count": 0,
+    "api_failures": 0,
+    "avg_utilization": None
 }
+# Only aggregates and the last few snapshots stay in memory
+recent_snapshots = deque(maxlen=RECENT_SNAPSHOTS)
+util_total = util_count = 0
+
+def dump_line(obj):
+    """One NDJSON line (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return (json.dumps(obj) + "\n").encode()
+
+def save_stats():
+    """Write the aggregate summary; snapshots already live in SNAPSHOTS_FILE"""
+    stats["recent_peak_memory_gb"] = max(
+        (snap["gpu"].get("memory_used_gb", 0) for snap in recent_snapshots), default=0)
+    if orjson is not None:
+        with open(STATS_FILE, 'wb') as f:
+            f.write(orjson.dumps(stats, option=orjson.OPT_INDENT_2))
+    else:
+        with open(STATS_FILE, 'w') as f:
+            json.dump(stats, f, indent=2)
 
 def get_gpu_stats():
-    """Get current GPU memory usage"""
-    try:
-        result = subprocess.run([
-            'nvidia-smi', '--query-gpu=index,utilization.gpu,memory.used,memory.total',
-            '--format=csv,noheader,nounits'
-        ], capture_output=True, text=True, check=True)
-        
-        lines = result.stdout.strip().split('\n')
-        for line in lines:
-            parts = [x.strip() for x in line.split(',')]
-            if parts[0] == str(GPU_ID):
-                return {
-                    "gpu_id": int(parts[0]),
-                    "utilization": f"{parts[1]}%",
-                    "memory_used_mb": int(parts[2]),
-                    "memory_total_mb": int(parts[3]),
-                    "memory_used_gb": round(int(parts[2]) / 1024, 2),
-                    "memory_total_gb": round(int(parts[3]) / 1024, 2)
-                }
-    except Exception as e:
-        return {"error": str(e)}
-    return {}
+    """Get current GPU memory usage (NVML, nvidia-smi fallback)"""
+    gpu = query_gpu(GPU_ID)
+    if gpu is None:
+        return {"error": f"GPU {GPU_ID} not readable"}
+    return {
+        "gpu_id": GPU_ID,
+        "utilization": f"{gpu['utilization']}%",
+        "utilization_pct": gpu["utilization"],
+        "memory_used_mb": gpu["used_mb"],
+        "memory_total_mb": gpu["total_mb"],
+        "memory_used_gb": round(gpu["used_mb"] / 1024, 2),
+        "memory_total_gb": round(gpu["total_mb"] / 1024, 2)
+    }
 
 # Initial GPU stats
 print("\n📊 Initial GPU Status:")
@@ -69,14 +106,18 @@ print(f"   GPU {GPU_ID}: {initial_gpu.get('memory_used_gb', 'N/A')} GB / {initia
 print(f"   Utilization: {initial_gpu.get('utilization', 'N/A')}")
 stats["initial_gpu"] = initial_gpu
 
+# NVML: 1 s utilization/memory sampling in the background between snapshots
+sampler = start_sampler(GPU_ID)
+
 # Copy files to GPU data directory
 print("\n📁 Copying files to GPU data directory...")
 gpu_data_dir = os.path.expanduser(f"~/heygem_data/gpu{GPU_ID}/face2face/")
 os.makedirs(gpu_data_dir, exist_ok=True)
 
 try:
-    subprocess.run(['cp', f'/nvme0n1-disk/HeyGem/{VIDEO_FILE}', gpu_data_dir], check=True)
-    subprocess.run(['cp', f'/nvme0n1-disk/HeyGem/{AUDIO_FILE}', gpu_data_dir], check=True)
+    # Hardlinks when on the same filesystem, copies otherwise
+    link_or_copy(f'/nvme0n1-disk/HeyGem/{VIDEO_FILE}', f'{gpu_data_dir}{VIDEO_FILE}')
+    link_or_copy(f'/nvme0n1-disk/HeyGem/{AUDIO_FILE}', f'{gpu_data_dir}{AUDIO_FILE}')
     print("   ✅ Files copied successfully")
 except Exception as e:
     print(f"   ❌ Error copying files: {e}")
@@ -84,8 +125,8 @@ except Exception as e:
 
 # Submit task
 print("\n📤 Submitting task to GPU...")
-start_time = time.time()
-stats["submit_timestamp"] = start_time
+start_time = time.monotonic()  # elapsed tracking; immune to NTP/clock steps
+stats["submit_timestamp"] = time.time()
 
 payload = {
     "audio_url": f"/code/data/face2face/{AUDIO_FILE}",
@@ -97,10 +138,10 @@ payload = {
 }
 
 try:
-    response = requests.post(
+    response = session.post(
         f"http://127.0.0.1:{GPU_PORT}/easy/submit",
         json=payload,
-        timeout=30
+        timeout=(1, 30)
     )
     
     result = response.json()
@@ -123,9 +164,46 @@ print("   ⚠️  NO TIMEOUT - Will wait as long as needed!")
 print("   💡 Press Ctrl+C to stop monitoring (task will continue in background)\n")
 
 check_interval = 10
+API_CHECK_EVERY_N = 6  # /easy/query + GPU snapshot every 6th check (60 s)
+tick = 0
 elapsed = 0
 last_progress = -1
 output_file = os.path.expanduser(f"~/heygem_data/gpu{GPU_ID}/temp/{TASK_CODE}-r.mp4")
+output_dir, output_name = os.path.split(output_file)
+# Loop invariants, built once
+query_url = f"http://127.0.0.1:{GPU_PORT}/easy/query?code={TASK_CODE}"
+STATUS_LINE = "[%4ds / %2dm] Progress: %3d%% | GPU: %s GB (%s) | Waiting..."
+QUERY_TIMEOUT = (1, 3)  # connect, read: a wedged container can't stall the loop
+# Snapshots are appended (gzip, flushed per snapshot) as they are taken,
+# so an interrupted run keeps them
+snapshots_f = gzip.open(SNAPSHOTS_FILE, 'ab')
+
+# inotify on the temp dir wakes the loop as soon as the output is closed/moved in;
+# without it the loop just sleeps check_interval
+output_watch = None
+if INOTIFY_AVAILABLE:
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        output_watch = INotify()
+        output_watch.add_watch(output_dir, flags.CLOSE_WRITE | flags.MOVED_TO)
+    except OSError:
+        if output_watch is not None:
+            output_watch.close()
+        output_watch = None
+
+def wait_for_output(timeout):
+    """Wait up to timeout seconds, returning early once the output file is written"""
+    if output_watch is None:
+        time.sleep(timeout)
+        return
+    # temp/ also gets the worker's intermediate files; only our output ends the wait
+    deadline = time.monotonic() + timeout
+    while True:
+        left = deadline - time.monotonic()
+        if left <= 0:
+            return
+        if any(event.name == output_name for event in output_watch.read(timeout=int(left * 1000))):
+            return
 
 # Infinite loop - will only exit when file is created or user interrupts
 while True:
@@ -134,19 +212,14 @@ while True:
         if os.path.exists(output_file):
             # Wait for file write to complete
             print("\n⏳ Video file detected! Waiting to ensure complete write...")
-            time.sleep(5)
-            
-            # Verify file size stability
-            size1 = os.path.getsize(output_file)
-            time.sleep(2)
-            size2 = os.path.getsize(output_file)
-            
-            if size1 != size2:
-                print("⚠️  File still being written, waiting 10 more seconds...")
-                time.sleep(10)
+            # Size stability via fstat on one open fd; the final size is reused below
+            try:
+                output_size = wait_until_written(output_file)
+            except TimeoutError as e:
+                print(f"   ⏳ {e}, checking again...")
+                continue
             
-            end_time = time.time()
-            total_time = end_time - start_time
+            total_time = time.monotonic() - start_time
             
             print("\n✅ Video generation completed!")
             print("=" * 80)
@@ -160,81 +233,91 @@ while True:
             
             # Get final task data
             try:
-                response = requests.get(
-                    f"http://127.0.0.1:{GPU_PORT}/easy/query?code={TASK_CODE}",
-                    timeout=10
-                )
+                response = session.get(query_url, timeout=QUERY_TIMEOUT)
                 stats["final_result"] = response.json().get('data', {})
             except:
                 pass
             
-            # Get file size
-            file_size = os.path.getsize(output_file) / (1024 * 1024)  # MB
+            file_size = output_size / (1024 * 1024)  # MB
             
             # Print summary
             print(f"⏱️  Total Time: {stats['total_time_minutes']:.2f} minutes ({stats['total_time_seconds']:.1f} seconds)")
             print(f"🎯 GPU Used: GPU {GPU_ID}")
-            print(f"💾 Peak GPU Memory: {max([s.get('gpu', {}).get('memory_used_gb', 0) for s in stats['gpu_snapshots']] or [0]):.2f} GB")
+            print(f"💾 Peak GPU Memory: {stats['peak_memory_used_gb']:.2f} GB")
             print(f"📁 Output: {output_file} ({file_size:.1f} MB)")
             print("=" * 80)
             
             # Save stats to file
-            with open(STATS_FILE, 'w') as f:
-                json.dump(stats, f, indent=2)
-            print(f"\n📊 Performance stats saved to: {STATS_FILE}")
+            save_stats()
+            print(f"\n📊 Performance stats saved to: {STATS_FILE} (snapshots: {SNAPSHOTS_FILE})")
             
             # Copy output with verification
             output_name = f"output_{TASK_CODE}.mp4"
             print(f"📋 Copying complete file to /nvme0n1-disk/HeyGem/{output_name}...")
-            subprocess.run([
-                'cp',
-                output_file,
-                f"/nvme0n1-disk/HeyGem/{output_name}"
-            ])
-            
-            # Verify copy
-            copied_size = os.path.getsize(f"/nvme0n1-disk/HeyGem/{output_name}") / (1024 * 1024)
-            if abs(copied_size - file_size) < 0.1:
-                print(f"✅ Copy verified: {output_name} ({copied_size:.1f} MB)")
+            try:
+                # In-kernel copy (reflink / copy_file_range / sendfile), no cp fork
+                copied_size = fast_copy(output_file, f"/nvme0n1-disk/HeyGem/{output_name}") / (1024 * 1024)
+            except OSError as e:
+                print(f"❌ Copy failed: {e}")
             else:
-                print(f"⚠️  Copy size mismatch! Original: {file_size:.1f} MB, Copied: {copied_size:.1f} MB")
+                # Verify copy
+                if abs(copied_size - file_size) < 0.1:
+                    print(f"✅ Copy verified: {output_name} ({copied_size:.1f} MB)")
+                else:
+                    print(f"⚠️  Copy size mismatch! Original: {file_size:.1f} MB, Copied: {copied_size:.1f} MB")
             
             print("\n" + "=" * 80)
             break
         
-        # Get API progress (informational only, not used for completion detection)
-        try:
-            response = requests.get(
-                f"http://127.0.0.1:{GPU_PORT}/easy/query?code={TASK_CODE}",
-                timeout=10
-            )
-            
-            data = response.json().get('data', {})
-            progress = data.get('progress', 0)
-            status = data.get('status', 'unknown')
-            
-            # Get GPU stats
-            gpu_stats = get_gpu_stats()
-            
-            # Log every check (progress API may not update reliably)
-            snapshot = {
-                "elapsed_seconds": elapsed,
-                "progress": progress,
-                "status": status,
-                "gpu": gpu_stats,
-                "timestamp": datetime.now().strftime('%H:%M:%S')
-            }
-            stats["gpu_snapshots"].append(snapshot)
-            
-            # Show status every check
-            print(f"[{elapsed:4d}s / {elapsed//60:2d}m] Progress: {progress:3d}% | GPU: {gpu_stats.get('memory_used_gb', 'N/A')} GB ({gpu_stats.get('utilization', 'N/A')}) | Waiting...")
-            
-        except Exception as e:
-            print(f"[{elapsed:4d}s] Monitoring... (API check failed, continuing)")
-        
+        # Get API progress (informational only, not used for completion detection),
+        # on a slower cadence than the file check
+        if tick % API_CHECK_EVERY_N == 0:
+            try:
+                response = session.get(query_url, timeout=QUERY_TIMEOUT)
+                
+                data = response.json().get('data', {})
+                progress = data.get('progress', 0)
+                status = data.get('status', 'unknown')
+                
+                # Get GPU stats (+ everything the sampler saw since the last snapshot)
+                gpu_stats = get_gpu_stats()
+                if sampler is not None:
+                    window = sampler.take()
+                    gpu_stats["window"] = window
+                    stats["peak_memory_used_gb"] = max(stats["peak_memory_used_gb"],
+                                                       round(window["peak_used_mb"] / 1024, 2))
+                
+                # Log every API check (progress API may not update reliably)
+                snapshot = {
+                    "elapsed_seconds": elapsed,
+                    "progress": progress,
+                    "status": status,
+                    "gpu": gpu_stats,
+                    "timestamp": time.strftime('%H:%M:%S')
+                }
+                snapshots_f.write(dump_line(snapshot))
+                snapshots_f.flush()
+                recent_snapshots.append(snapshot)
+                stats["snapshot_count"] += 1
+                if "utilization_pct" in gpu_stats:
+                    util_total += gpu_stats["utilization_pct"]
+                    util_count += 1
+                    stats["avg_utilization"] = round(util_total / util_count, 1)
+                stats["peak_memory_used_gb"] = max(stats["peak_memory_used_gb"], gpu_stats.get('memory_used_gb', 0))
+                
+                # Show status every API check
+                print(STATUS_LINE % (elapsed, elapsed // 60, progress,
+                                     gpu_stats.get('memory_used_gb', 'N/A'), gpu_stats.get('utilization', 'N/A')))
+                
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                stats["api_failures"] += 1
+                print(f"[{elapsed:4d}s] Monitoring... (API not responding, continuing)")
+            except Exception as e:
+                print(f"[{elapsed:4d}s] Monitoring... (API check failed, continuing)")
         
-        time.sleep(check_interval)
-        elapsed += check_interval
+        tick += 1
+        wait_for_output(check_interval)
+        elapsed = int(time.monotonic() - start_time)
         
     except KeyboardInterrupt:
         print("\n\n⚠️  Monitoring stopped by user (Ctrl+C)")
@@ -245,12 +328,16 @@ while True:
         # Save stats even on interrupt
         stats["status"] = "interrupted"
         stats["elapsed_at_interrupt"] = elapsed
-        with open(STATS_FILE, 'w') as f:
-            json.dump(stats, f, indent=2)
+        save_stats()
         print(f"   Stats saved to: {STATS_FILE}")
         break
     
     except Exception as e:
         print(f"   ⚠️  Error: {e}, continuing...")
+snapshots_f.close()
+if output_watch is not None:
+    output_watch.close()
+if sampler is not None:
+    sampler.stop()
 print("\n🎉 Process completed!")
 print("=" * 80)
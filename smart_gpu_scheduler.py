@@ -4,14 +4,38 @@ Intelligent GPU Scheduler for HeyGem
 Handles up to 6 parallel videos (2 per GPU) with smart GPU selection
 """
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import time
-import subprocess
 import os
 import threading
 from datetime import datetime
-from queue import Queue
+from queue import Queue, Empty
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Tuple
+from gpu_utils import query_all_gpus
+from file_utils import fast_copy, link_or_copy, wait_until_written
+
+try:
+    from inotify_simple import INotify, flags
+    INOTIFY_AVAILABLE = True
+except ImportError:
+    INOTIFY_AVAILABLE = False
+
+GPU_CACHE_TTL = 1.0  # seconds a GPU stats snapshot is reused
+POLL_INTERVAL = 5  # first output check without inotify, and again after every new task or finished output
+MAX_POLL_INTERVAL = 30  # cap for the polling backoff
+POLL_BACKOFF = 1.5  # interval growth after each poll that finds nothing
+HEARTBEAT_INTERVAL = 60  # stat sweep even with inotify, in case an event is missed (NFS etc.)
+TASK_MEMORY_GB = 10  # GPU memory needed per running task, used to size max_tasks at startup
+
+# Per-GPU host paths, resolved once
+HEYGEM_ROOT = os.path.expanduser("~/heygem_data")
+FACE2FACE_DIRS = {gpu_id: os.path.join(HEYGEM_ROOT, f"gpu{gpu_id}", "face2face") for gpu_id in (0, 1, 2)}
+TEMP_DIRS = {gpu_id: os.path.join(HEYGEM_ROOT, f"gpu{gpu_id}", "temp") for gpu_id in (0, 1, 2)}
+OUTPUT_DIR = "/nvme0n1-disk/HeyGem"
+
+_STOP = object()  # queue sentinel put by shutdown()
 
 class GPUScheduler:
     def __init__(self):
@@ -21,57 +45,107 @@ class GPUScheduler:
             2: {"port": 8392, "max_tasks": 2, "current_tasks": 0}
         }
         self.task_queue = Queue()
-        self.active_tasks = {}  # {task_code: {gpu_id, thread, status}}
+        self.active_tasks = {}  # {task_code: {gpu_id, status, ...}}
         self.completed_tasks = []
+        self._shutdown = False
         self.lock = threading.Lock()
+        # Signalled whenever a GPU slot is released (task finished or submit failed)
+        self._slot_freed = threading.Condition(self.lock)
         
+        # Keep-alive pool shared by submit and all monitor threads
+        self.session = requests.Session()
+        self.session.headers.update({"Connection": "keep-alive"})
+        self.session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=32, pool_block=False))
+        
+        # Completion: one watcher thread for all tasks ({output_file: task info}),
+        # plus a small pool for the blocking wait/copy of finished outputs
+        self._watched = {}
+        self._watcher = None
+        self._watch_reset = threading.Event()  # set on every (re)registration: restart the poll backoff
+        self._finishers = ThreadPoolExecutor(max_workers=len(self.gpu_config))
+        
+        # One stats query for all GPUs, shared by every caller for GPU_CACHE_TTL.
+        # Separate lock: find_and_reserve_gpu reads it while already holding self.lock
+        self._gpu_cache = {}
+        self._gpu_cache_ts = 0.0
+        self._gpu_cache_lock = threading.Lock()
+        
+        self._size_slots()
+    
+    def _size_slots(self):
+        """
+        One memory probe at startup: fit max_tasks to the free memory of each GPU
+        (never above the configured value), so scheduling can trust the slot counter
+        """
+        for gpu_id, config in self.gpu_config.items():
+            mem = self.get_gpu_memory(gpu_id)
+            if mem:
+                config["max_tasks"] = min(config["max_tasks"], max(1, int(mem["available_gb"] // TASK_MEMORY_GB)))
+    
+    def _refresh_gpu_cache(self):
+        """Re-query all GPUs if the cached stats are older than GPU_CACHE_TTL (call with _gpu_cache_lock held)"""
+        now = time.monotonic()
+        if now - self._gpu_cache_ts > GPU_CACHE_TTL:
+            self._gpu_cache = query_all_gpus()
+            self._gpu_cache_ts = now
+    
     def get_gpu_memory(self, gpu_id: int) -> Dict:
-        """Get current GPU memory usage"""
-        try:
-            result = subprocess.run([
-                'nvidia-smi', '--query-gpu=index,memory.used,memory.total',
-                '--format=csv,noheader,nounits'
-            ], capture_output=True, text=True, check=True)
-            
-            for line in result.stdout.strip().split('\n'):
-                parts = [x.strip() for x in line.split(',')]
-                if int(parts[0]) == gpu_id:
-                    return {
-                        "gpu_id": gpu_id,
-                        "used_mb": int(parts[1]),
-                        "total_mb": int(parts[2]),
-                        "used_gb": round(int(parts[1]) / 1024, 2),
-                        "available_gb": round((int(parts[2]) - int(parts[1])) / 1024, 2)
-                    }
-        except Exception as e:
-            print(f"⚠️  GPU stats error: {e}")
-        return {}
+        """Get current GPU memory usage (cached for GPU_CACHE_TTL across callers)"""
+        with self._gpu_cache_lock:
+            self._refresh_gpu_cache()
+            gpu = self._gpu_cache.get(gpu_id)
+        if gpu is None:
+            print(f"⚠️  GPU stats error: GPU {gpu_id} not readable")
+            return {}
+        return {
+            "gpu_id": gpu_id,
+            "used_mb": gpu["used_mb"],
+            "total_mb": gpu["total_mb"],
+            "used_gb": round(gpu["used_mb"] / 1024, 2),
+            "available_gb": round((gpu["total_mb"] - gpu["used_mb"]) / 1024, 2)
+        }
     
-    def find_available_gpu(self) -> int:
+    def find_and_reserve_gpu(self) -> int:
         """
-        Find first available GPU with free slot
+        Find first available GPU with free slot and reserve the slot
         Priority: GPU 0 -> GPU 1 -> GPU 2
-        Returns: GPU ID or -1 if all full
+        Blocks until a slot is released (re-checking memory every 10s); returns the GPU ID.
+        The caller owns the slot and must release_gpu() it if the submit fails.
         """
-        with self.lock:
-            for gpu_id in [0, 1, 2]:  # Priority order
-                config = self.gpu_config[gpu_id]
-                if config["current_tasks"] < config["max_tasks"]:
-                    # Check actual memory availability
-                    mem = self.get_gpu_memory(gpu_id)
-                    if mem.get("available_gb", 0) > 10:  # Need at least 10GB free
+        with self._slot_freed:
+            while True:
+                for gpu_id in [0, 1, 2]:  # Priority order
+                    config = self.gpu_config[gpu_id]
+                    if config["current_tasks"] < config["max_tasks"]:
+                        # max_tasks was sized from memory at startup; only an idle GPU is
+                        # re-checked, in case something outside the scheduler is using it
+                        if config["current_tasks"] == 0:
+                            mem = self.get_gpu_memory(gpu_id)
+                            if mem.get("available_gb", 0) <= TASK_MEMORY_GB:
+                                continue
+                        config["current_tasks"] += 1
                         return gpu_id
-        return -1
+                print("⏳ All GPUs busy, waiting...")
+                self._slot_freed.wait(timeout=10)
+    
+    def release_gpu(self, gpu_id: int):
+        """Give a reserved slot back and wake the queue"""
+        with self._slot_freed:
+            self.gpu_config[gpu_id]["current_tasks"] -= 1
+            self._slot_freed.notify_all()
     
     def submit_task(self, video_file: str, audio_file: str, task_code: str, gpu_id: int):
-        """Submit task to specific GPU"""
-        # Copy files to GPU data directory
-        gpu_data_dir = os.path.expanduser(f"~/heygem_data/gpu{gpu_id}/face2face/")
+        """Submit task to specific GPU (slot already reserved by find_and_reserve_gpu)"""
+        # Hardlink files into GPU data directory (a symlink would point outside the
+        # container's bind mount; falls back to a copy across filesystems)
+        gpu_data_dir = FACE2FACE_DIRS[gpu_id]
         os.makedirs(gpu_data_dir, exist_ok=True)
+        video_name = os.path.basename(video_file)
+        audio_name = os.path.basename(audio_file)
         
         try:
-            subprocess.run(['cp', video_file, gpu_data_dir], check=True)
-            subprocess.run(['cp', audio_file, gpu_data_dir], check=True)
+            link_or_copy(video_file, os.path.join(gpu_data_dir, video_name))
+            link_or_copy(audio_file, os.path.join(gpu_data_dir, audio_name))
         except Exception as e:
             print(f"❌ File copy error: {e}")
             return False
@@ -79,8 +153,8 @@ class GPUScheduler:
         # Submit to GPU
         port = self.gpu_config[gpu_id]["port"]
         payload = {
-            "audio_url": f"/code/data/face2face/{os.path.basename(audio_file)}",
-            "video_url": f"/code/data/face2face/{os.path.basename(video_file)}",
+            "audio_url": f"/code/data/face2face/{audio_name}",
+            "video_url": f"/code/data/face2face/{video_name}",
             "code": task_code,
             "chaofen": 0,
             "watermark_switch": 0,
@@ -88,15 +162,13 @@ class GPUScheduler:
         }
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"http://127.0.0.1:{port}/easy/submit",
                 json=payload,
-                timeout=30
+                timeout=(1, 30)  # fail fast on connect, allow a slow submit
             )
             result = response.json()
             if result.get('success'):
-                with self.lock:
-                    self.gpu_config[gpu_id]["current_tasks"] += 1
                 print(f"✅ Task {task_code} submitted to GPU {gpu_id} (Port {port})")
                 return True
             else:
@@ -106,47 +178,125 @@ class GPUScheduler:
             print(f"❌ API error: {e}")
             return False
     
-    def monitor_task(self, task_code: str, gpu_id: int, video_file: str, audio_file: str):
-        """Monitor task until completion"""
-        port = self.gpu_config[gpu_id]["port"]
-        output_file = os.path.expanduser(f"~/heygem_data/gpu{gpu_id}/temp/{task_code}-r.mp4")
-        
-        start_time = time.time()
+    def _open_output_watch(self, temp_dirs: List[str]):
+        """One inotify fd watching every GPU temp dir -> (inotify, {wd: dir}), or (None, {}) to poll"""
+        if not INOTIFY_AVAILABLE:
+            return None, {}
+        try:
+            inotify = INotify()
+        except OSError:
+            return None, {}
+        try:
+            watch_dirs = {}
+            for temp_dir in temp_dirs:
+                os.makedirs(temp_dir, exist_ok=True)
+                watch_dirs[inotify.add_watch(temp_dir, flags.CLOSE_WRITE | flags.MOVED_TO)] = temp_dir
+            return inotify, watch_dirs
+        except OSError:
+            inotify.close()
+            return None, {}
+    
+    def _watch_outputs(self):
+        """
+        Single watcher thread for every running task: waits on one inotify fd for all
+        GPU temp dirs and hands finished outputs to the finisher pool. Every
+        HEARTBEAT_INTERVAL it also stats all pending outputs, in case an event was
+        missed (NFS etc.) or the file landed before the task was registered.
+        Without inotify it only polls, backing off from POLL_INTERVAL to MAX_POLL_INTERVAL
+        while nothing finishes; a new task or a finished output restarts the backoff.
+        """
+        temp_dirs = [TEMP_DIRS[gpu_id] for gpu_id in self.gpu_config]
+        inotify, watch_dirs = self._open_output_watch(temp_dirs)
+        sweep_interval = HEARTBEAT_INTERVAL if inotify is not None else POLL_INTERVAL
+        last_sweep = 0.0
         
         while True:
-            # Check if output file exists
-            if os.path.exists(output_file):
-                time.sleep(3)  # Wait for write completion
-                
-                # Verify file size
-                if os.path.getsize(output_file) > 1000:  # At least 1KB
-                    elapsed = time.time() - start_time
-                    
-                    # Copy to main directory
-                    output_name = f"output_{task_code}.mp4"
-                    subprocess.run([
-                        'cp', output_file,
-                        f"/nvme0n1-disk/HeyGem/{output_name}"
-                    ])
-                    
-                    # Update status
-                    with self.lock:
-                        self.gpu_config[gpu_id]["current_tasks"] -= 1
-                        self.active_tasks[task_code]["status"] = "completed"
-                        self.active_tasks[task_code]["elapsed"] = elapsed
-                        self.completed_tasks.append({
-                            "task_code": task_code,
-                            "gpu_id": gpu_id,
-                            "elapsed": elapsed,
-                            "output": output_name,
-                            "video": os.path.basename(video_file),
-                            "audio": os.path.basename(audio_file)
-                        })
-                    
-                    print(f"✅ [{task_code}] Completed on GPU {gpu_id} in {elapsed/60:.1f} mins")
-                    break
+            if inotify is not None:
+                # temp/ also receives the worker's intermediate files; only pending names matter
+                events = inotify.read(timeout=int(sweep_interval * 1000))
+                written = {os.path.join(watch_dirs[e.wd], e.name) for e in events if e.wd in watch_dirs}
+            else:
+                if self._watch_reset.wait(sweep_interval):
+                    self._watch_reset.clear()
+                    sweep_interval = POLL_INTERVAL
+                    continue
+                written = set()
+            
+            with self.lock:
+                ready = [path for path in self._watched if path in written]
+                if time.monotonic() - last_sweep >= sweep_interval:
+                    ready += [path for path in self._watched if path not in written and os.path.exists(path)]
+                    last_sweep = time.monotonic()
+                for path in ready:
+                    self._finishers.submit(self._finish_task, path, *self._watched.pop(path))
+                if inotify is None:
+                    sweep_interval = POLL_INTERVAL if ready else min(MAX_POLL_INTERVAL, sweep_interval * POLL_BACKOFF)
+    
+    def _finish_task(self, output_file: str, task_code: str, gpu_id: int,
+                     video_file: str, audio_file: str, start_time: float):
+        """
+        Wait for the output write to finish, copy it out and free the GPU slot.
+        Runs on the finisher pool, where nobody reads the future: any error marks
+        the task failed and frees its slot here instead of being lost.
+        """
+        try:
+            # Wait for write completion
+            try:
+                output_size = wait_until_written(output_file)
+            except TimeoutError:
+                output_size = None
             
-            time.sleep(5)
+            # Still being written, or not even 1KB yet: hand it back to the watcher
+            if output_size is None or output_size <= 1000:
+                with self.lock:
+                    self._watched[output_file] = (task_code, gpu_id, video_file, audio_file, start_time)
+                self._watch_reset.set()
+                return
+            
+            elapsed = time.monotonic() - start_time
+            
+            # Copy to main directory
+            output_name = f"output_{task_code}.mp4"
+            try:
+                fast_copy(output_file, os.path.join(OUTPUT_DIR, output_name))
+            except OSError as e:
+                print(f"⚠️  [{task_code}] Copy to {OUTPUT_DIR} failed: {e}")
+        except Exception as e:
+            print(f"❌ [{task_code}] Finishing failed on GPU {gpu_id}: {e}")
+            with self._slot_freed:
+                self.gpu_config[gpu_id]["current_tasks"] -= 1
+                self._slot_freed.notify_all()
+                self.active_tasks[task_code]["status"] = "failed"
+                self.active_tasks[task_code]["error"] = str(e)
+            return
+        
+        # Update status
+        with self._slot_freed:
+            self.gpu_config[gpu_id]["current_tasks"] -= 1
+            self._slot_freed.notify_all()
+            self.active_tasks[task_code]["status"] = "completed"
+            self.active_tasks[task_code]["elapsed"] = elapsed
+            self.completed_tasks.append({
+                "task_code": task_code,
+                "gpu_id": gpu_id,
+                "elapsed": elapsed,
+                "output": output_name,
+                "video": os.path.basename(video_file),
+                "audio": os.path.basename(audio_file)
+            })
+        
+        print(f"✅ [{task_code}] Completed on GPU {gpu_id} in {elapsed/60:.1f} mins")
+    
+    def monitor_task(self, task_code: str, gpu_id: int, video_file: str, audio_file: str):
+        """Register a task with the shared output watcher (returns immediately)"""
+        output_file = os.path.join(TEMP_DIRS[gpu_id], f"{task_code}-r.mp4")
+        
+        with self.lock:
+            self._watched[output_file] = (task_code, gpu_id, video_file, audio_file, time.monotonic())
+            self._watch_reset.set()
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch_outputs, daemon=True)
+                self._watcher.start()
     
     def add_video_task(self, video_file: str, audio_file: str, task_name: str = None):
         """Add video to processing queue"""
@@ -160,21 +310,36 @@ class GPUScheduler:
         })
         print(f"📝 Added to queue: {task_name}")
     
+    def shutdown(self, drain: bool = True):
+        """
+        Stop process_queue: once every task queued so far has been submitted (drain),
+        or right after the task it is currently handling
+        """
+        if not drain:
+            self._shutdown = True
+        self.task_queue.put(_STOP)
+    
     def process_queue(self):
-        """Process queue and assign tasks to available GPUs"""
-        while not self.task_queue.empty():
-            # Find available GPU
-            gpu_id = self.find_available_gpu()
-            
-            if gpu_id == -1:
-                print("⏳ All GPUs busy, waiting...")
-                time.sleep(10)
+        """
+        Process queue and assign tasks to available GPUs.
+        Blocks waiting for tasks (they can be added while it runs) until shutdown().
+        """
+        while not self._shutdown:
+            # Wait for the next task
+            try:
+                task = self.task_queue.get(timeout=5)
+            except Empty:
+                continue
+            if task is _STOP:
+                if self.task_queue.empty():
+                    break
+                self.task_queue.put(_STOP)  # failed tasks were re-queued behind it
                 continue
-            
-            # Get next task from queue
-            task = self.task_queue.get()
             task_code = task["code"]
             
+            # Wait for a free GPU slot and claim it
+            gpu_id = self.find_and_reserve_gpu()
+            
             # Submit task
             success = self.submit_task(
                 task["video"],
@@ -184,28 +349,23 @@ class GPUScheduler:
             )
             
             if success:
-                # Start monitoring thread
-                monitor_thread = threading.Thread(
-                    target=self.monitor_task,
-                    args=(task_code, gpu_id, task["video"], task["audio"])
-                )
-                monitor_thread.daemon = True
-                monitor_thread.start()
-                
                 # Track task
                 with self.lock:
                     self.active_tasks[task_code] = {
                         "gpu_id": gpu_id,
-                        "thread": monitor_thread,
                         "status": "running",
-                        "start_time": time.time(),
+                        "start_time": time.monotonic(),
                         "video": task["video"],
                         "audio": task["audio"]
                     }
                 
+                # Hand the task to the shared output watcher
+                self.monitor_task(task_code, gpu_id, task["video"], task["audio"])
+                
                 time.sleep(2)  # Small delay between submissions
             else:
                 # Re-queue on failure
+                self.release_gpu(gpu_id)
                 self.task_queue.put(task)
                 time.sleep(5)
         
@@ -230,7 +390,7 @@ class GPUScheduler:
                 print("   None")
             for code, info in self.active_tasks.items():
                 if info["status"] == "running":
-                    elapsed = time.time() - info["start_time"]
+                    elapsed = time.monotonic() - info["start_time"]
                     print(f"   {code}: GPU {info['gpu_id']} | {elapsed/60:.1f} mins")
         
         print(f"\n✅ COMPLETED: {len(self.completed_tasks)}")
@@ -294,6 +454,9 @@ def main():
     print(f"\n📝 Queue size: {scheduler.task_queue.qsize()} tasks")
     print("🔄 Starting processing...")
     
+    # No more tasks: process_queue returns once the queue is drained
+    scheduler.shutdown()
+    
     # Start processing
     scheduler.process_queue()
     
@@ -5,11 +5,7 @@ Better test - Track GPU states during processing
 import sys
 sys.path.insert(0, '/nvme0n1-disk/nvme01/HeyGem/webapp')
 
-# Reload module
-import importlib
-import gpu_scheduler
-importlib.reload(gpu_scheduler)
-from gpu_scheduler import scheduler
+from gpu_scheduler import make_scheduler
 
 import time
 
@@ -17,12 +13,8 @@ print("=" * 80)
 print("✅ DETAILED GPU STATE TRACKING TEST")
 print("=" * 80)
 
-# Reset
-with scheduler.lock:
-    scheduler.task_queue.clear()
-    scheduler.active_tasks.clear()
-    for gpu_id in [0, 1, 2]:
-        scheduler.gpu_config[gpu_id]["busy"] = False
+# Fresh scheduler: clean queue, no active tasks, all GPUs free
+scheduler = make_scheduler()
 
 # Add 3 tasks
 print("\n1️⃣ Adding 3 tasks:")
@@ -36,8 +28,7 @@ for i in range(1, 4):
         "status": "queued",
         "queued_at": time.time()
     }
-    with scheduler.lock:
-        scheduler.task_queue.append(task)
+    scheduler.enqueue(task)
 
 with scheduler.lock:
     print(f"   Queue size: {len(scheduler.task_queue)}")
@@ -45,7 +36,7 @@ with scheduler.lock:
 
 print("\n2️⃣ First process_next_in_queue() call:")
 with scheduler.lock:
-    print(f"   BEFORE: Queue={len(scheduler.task_queue)}, Busy GPUs={[g for g in [0,1,2] if scheduler.gpu_config[g]['busy']]}")
+    print(f"   BEFORE: Queue={len(scheduler.task_queue)}, Busy GPUs={[g for g in [0,1,2] if scheduler.busy[g]]}")
 
 # Mock submit to just track assignment
 calls = []
@@ -62,15 +53,32 @@ scheduler.process_next_in_queue()
 scheduler.submit_to_gpu = original
 
 with scheduler.lock:
-    print(f"   AFTER:  Queue={len(scheduler.task_queue)}, Busy GPUs={[g for g in [0,1,2] if scheduler.gpu_config[g]['busy']]}")
+    print(f"   AFTER:  Queue={len(scheduler.task_queue)}, Busy GPUs={[g for g in [0,1,2] if scheduler.busy[g]]}")
     print(f"   Tasks in queue: {[t['task_id'] for t in scheduler.task_queue]}")
 
 print(f"\n3️⃣ Submit calls made: {calls}")
 print(f"   Expected: 1 call")
 print(f"   Actual: {len(calls)} call(s)")
 
-# Cleanup
+print("\n4️⃣ Owner-first dispatch (3 sequential calls, submit succeeds):")
 with scheduler.lock:
-    scheduler.task_queue.clear()
+    placed = {t["task_id"]: g for g, q in enumerate(scheduler.worker_queues) for t in q}
+print(f"   Placed: {placed}")
+dispatched = {}
+def mock_submit_ok(video, audio, tid, gid):
+    dispatched[tid] = gid
+    return True
+
+scheduler.submit_to_gpu = mock_submit_ok
+scheduler.monitor_task = lambda *args: None
+for _ in range(3):
+    scheduler.process_next_in_queue()
+scheduler.submit_to_gpu = original
+
+print(f"   Dispatched: {dispatched}")
+if dispatched == placed:
+    print(f"   ✅ Every task ran on the GPU whose deque it joined")
+else:
+    print(f"   ❌ Placement ignored! Expected: {placed}")
 
 print("=" * 80)
@@ -4,10 +4,17 @@ Direct GPU Test Script
 Tests GPU 1 and GPU 2 directly with default video
 """
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import subprocess
 import os
 import time
+from file_utils import link_or_copy
+
+# Keep-alive pool for every /easy/submit and /easy/query call
+session = requests.Session()
+session.headers.update({"Connection": "keep-alive"})
+session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=32, pool_block=False))
 
 # Configuration
 GPU_PORTS = {
@@ -28,10 +35,10 @@ def prepare_test_files(gpu_id):
         print(f"❌ Default video not found: {default_video}")
         return None, None
     
-    # Copy video
+    # Link video (copies across filesystems)
     video_filename = f"test_gpu{gpu_id}_video.mp4"
     video_dest = os.path.join(gpu_data_dir, video_filename)
-    subprocess.run(['cp', default_video, video_dest], check=True)
+    link_or_copy(default_video, video_dest)
     
     # Create dummy audio (1 second of silence)
     audio_filename = f"test_gpu{gpu_id}_audio.wav"
@@ -62,10 +69,10 @@ def submit_to_gpu(gpu_id, task_id, video_filename, audio_filename):
         print(f"   Task ID: {task_id}")
         print(f"{'='*80}")
         
-        response = requests.post(
+        response = session.post(
             f"http://127.0.0.1:{port}/easy/submit",
             json=payload,
-            timeout=30
+            timeout=(1, 30)
         )
         
         result = response.json()
@@ -90,9 +97,9 @@ def monitor_task(gpu_id, task_id, duration=30):
     start = time.time()
     while time.time() - start < duration:
         try:
-            response = requests.get(
+            response = session.get(
                 f"http://127.0.0.1:{port}/easy/query?code={task_id}",
-                timeout=3
+                timeout=(1, 3)
             )
             
             if response.status_code == 200:
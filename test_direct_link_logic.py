@@ -4,6 +4,58 @@ Test the get_direct_link() implementation with mock data
 This simulates what would happen with a PAID Vimeo account
 """
 import json
+from types import MappingProxyType
+
+try:
+    import numpy as np
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+NUMBA_MIN_FILES = 64  # below this, building the arrays costs more than the loop saves
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _best_index(widths, is_mp4):
+        """Index of the widest mp4 (first wins on ties), -1 if none - compiled"""
+        best_i, best_w = -1, -1
+        for i in range(widths.size):
+            if is_mp4[i] and widths[i] > best_w:
+                best_i, best_w = i, widths[i]
+        return best_i
+
+# Canned API responses, built once and shared read-only by every MockResponse
+_VIDEO_FIELDS = {
+    'uri': '/videos/123456',
+    'name': 'Test Video',
+    'link': 'https://vimeo.com/123456'
+}
+
+# Simulate paid account response
+_PAID_FILES = (
+    MappingProxyType({
+        'quality': 'hd',
+        'type': 'video/mp4',
+        'width': 1920,
+        'height': 1080,
+        'link': 'https://player.vimeo.com/external/123456.hd.mp4?s=abc123&profile_id=175'
+    }),
+    MappingProxyType({
+        'quality': 'sd',
+        'type': 'video/mp4',
+        'width': 640,
+        'height': 360,
+        'link': 'https://player.vimeo.com/external/123456.sd.mp4?s=def456&profile_id=164'
+    }),
+    MappingProxyType({
+        'quality': 'hls',
+        'type': 'video/mp2t',
+        'link': 'https://player.vimeo.com/external/123456.m3u8?s=ghi789'
+    })
+)
+_PAID_RESPONSE = MappingProxyType({**_VIDEO_FIELDS, 'files': _PAID_FILES})
+_FREE_RESPONSE = MappingProxyType(dict(_VIDEO_FIELDS))
 
 # Simulate the VimeoUploader class behavior
 class MockVimeoClient:
@@ -17,40 +69,32 @@ class MockVimeoClient:
                 self._has_files = has_files
             
             def json(self):
-                data = {
-                    'uri': '/videos/123456',
-                    'name': 'Test Video',
-                    'link': 'https://vimeo.com/123456'
-                }
-                
-                # Simulate paid account response
-                if self._has_files:
-                    data['files'] = [
-                        {
-                            'quality': 'hd',
-                            'type': 'video/mp4',
-                            'width': 1920,
-                            'height': 1080,
-                            'link': 'https://player.vimeo.com/external/123456.hd.mp4?s=abc123&profile_id=175'
-                        },
-                        {
-                            'quality': 'sd',
-                            'type': 'video/mp4',
-                            'width': 640,
-                            'height': 360,
-                            'link': 'https://player.vimeo.com/external/123456.sd.mp4?s=def456&profile_id=164'
-                        },
-                        {
-                            'quality': 'hls',
-                            'type': 'video/mp2t',
-                            'link': 'https://player.vimeo.com/external/123456.m3u8?s=ghi789'
-                        }
-                    ]
-                
-                return data
+                # Read-only views; copy.deepcopy() first if a caller ever needs to mutate
+                return _PAID_RESPONSE if self._has_files else _FREE_RESPONSE
         
         return MockResponse(self.has_files)
 
+def _pick_best_mp4_py(files):
+    """Pure-Python pick_best_mp4 (also the reference the compiled path is checked against)"""
+    best = None
+    best_width = -1
+    for file in files:
+        if file.get('type') == 'video/mp4':
+            width = file.get('width') or 0  # Vimeo sends null widths for HLS/DASH
+            if width > best_width:
+                best_width = width
+                best = file
+    return best
+
+def pick_best_mp4(files):
+    """Widest video/mp4 rendition in one pass (first one wins on equal width), or None"""
+    if NUMBA_AVAILABLE and len(files) >= NUMBA_MIN_FILES:
+        widths = np.fromiter((f.get('width') or 0 for f in files), dtype=np.int32, count=len(files))
+        is_mp4 = np.fromiter((f.get('type') == 'video/mp4' for f in files), dtype=np.bool_, count=len(files))
+        i = _best_index(widths, is_mp4)
+        return files[i] if i >= 0 else None
+    return _pick_best_mp4_py(files)
+
 # Test implementation (copied from vimeo_api.py)
 def get_direct_link_test(client, uri):
     """Test version of get_direct_link"""
@@ -60,13 +104,10 @@ def get_direct_link_test(client, uri):
             data = response.json()
             
             if 'files' in data:
-                # Sort by width descending
-                files = sorted(data['files'], key=lambda x: x.get('width', 0), reverse=True)
-                
-                # Find first mp4
-                for file in files:
-                    if file.get('type') == 'video/mp4':
-                        return file.get('link')
+                # Highest quality mp4
+                best = pick_best_mp4(data['files'])
+                if best:
+                    return best.get('link')
                         
         return None
     except Exception as e:
@@ -99,27 +140,51 @@ if result is None:
 else:
     print(f"❌ FAILED: Should have returned None, got: {result}")
 
-# Test 3: Verify sorting logic
-print("\n📊 Test 3: Quality Sorting Logic")
+# Test 3: Verify quality selection logic
+print("\n📊 Test 3: Quality Selection Logic")
 print("-" * 80)
 mock_files = [
     {'quality': 'sd', 'type': 'video/mp4', 'width': 640, 'link': 'SD_LINK'},
     {'quality': 'hd', 'type': 'video/mp4', 'width': 1920, 'link': 'HD_LINK'},
     {'quality': 'mobile', 'type': 'video/mp4', 'width': 360, 'link': 'MOBILE_LINK'},
 ]
-sorted_files = sorted(mock_files, key=lambda x: x.get('width', 0), reverse=True)
-first_mp4 = next((f for f in sorted_files if f.get('type') == 'video/mp4'), None)
-if first_mp4 and first_mp4['link'] == 'HD_LINK':
+best_mp4 = pick_best_mp4(mock_files)
+if best_mp4 and best_mp4['link'] == 'HD_LINK':
     print(f"✅ SUCCESS: Correctly selected highest quality (HD)")
-    print(f"   Order: {[f['quality'] for f in sorted_files]}")
+    print(f"   Selected: {best_mp4['quality']} ({best_mp4['width']}px) out of {[f['quality'] for f in mock_files]}")
 else:
     print(f"❌ FAILED: Wrong quality selected")
 
+# Test 4: Large rendition lists (compiled path when Numba is installed)
+print(f"\n📊 Test 4: Large Rendition List (>= {NUMBA_MIN_FILES} files)")
+print("-" * 80)
+many_files = []
+for i in range(NUMBA_MIN_FILES * 2):
+    if i % 4 == 0:
+        # Streaming renditions come back with null widths
+        many_files.append({'quality': 'hls', 'type': 'video/mp2t', 'width': None, 'link': f'HLS_{i}'})
+    else:
+        many_files.append({'quality': 'sd', 'type': 'video/mp4', 'width': 320 + (i % 7) * 160, 'link': f'MP4_{i}'})
+many_files.append({'quality': 'dash', 'type': 'video/mp4', 'width': None, 'link': 'NULL_WIDTH_MP4'})
+# Two renditions tie for the widest; the first one must win
+many_files[10] = {'quality': 'hd', 'type': 'video/mp4', 'width': 1920, 'link': 'FIRST_HD'}
+many_files[90] = {'quality': 'hd', 'type': 'video/mp4', 'width': 1920, 'link': 'SECOND_HD'}
+many_files[50] = {'quality': 'hd', 'type': 'video/mp2t', 'width': 3840, 'link': 'NOT_MP4'}
+
+expected = _pick_best_mp4_py(many_files)
+best_mp4 = pick_best_mp4(many_files)
+path = "Numba" if NUMBA_AVAILABLE else "pure-Python (Numba not installed)"
+if expected and expected['link'] == 'FIRST_HD' and best_mp4 is expected:
+    print(f"✅ SUCCESS: {path} path picked the first of the tied widest MP4s")
+    print(f"   Selected: {best_mp4['link']} ({best_mp4['width']}px) out of {len(many_files)} renditions")
+else:
+    print(f"❌ FAILED: {path} path picked {best_mp4 and best_mp4['link']}, expected {expected and expected['link']}")
+
 print("\n" + "="*80)
 print("📋 CONCLUSION")
 print("="*80)
 print("✅ Implementation is CORRECT")
 print("✅ Logic properly handles both paid and free accounts")
-print("✅ Sorting selects highest quality MP4")
+print("✅ Selection picks highest quality MP4")
 print("\n💡 The code will work automatically when you upgrade to a paid Vimeo plan!")
 print("="*80)
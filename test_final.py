@@ -5,27 +5,22 @@ Final Test - Simulate actual successful task processing
 import sys
 sys.path.insert(0, '/nvme0n1-disk/nvme01/HeyGem/webapp')
 
-import importlib
-import gpu_scheduler
-importlib.reload(gpu_scheduler)
-from gpu_scheduler import scheduler
+from gpu_scheduler import make_scheduler
 
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 print("=" * 80)
 print("🎯 FINAL TEST: Successful Task Processing with 3 GPUs")
 print("=" * 80)
 
-# Reset
-with scheduler.lock:
-    scheduler.task_queue.clear()
-    scheduler.active_tasks.clear()
-    for gpu_id in [0, 1, 2]:
-        scheduler.gpu_config[gpu_id]["busy"] = False
-
-# Add 3 tasks
-print("\n1️⃣ Adding 3 tasks to queue:")
-for i in range(1, 4):
+# Fresh scheduler: clean queue, no active tasks, all GPUs free
+scheduler = make_scheduler()
+
+# Add 5 tasks (3 run now, the 2 newest must stay queued)
+print("\n1️⃣ Adding 5 tasks to queue:")
+for i in range(1, 6):
     task = {
         "task_id": f"task_{i}",
         "video_path": "/tmp/dummy.mp4",
@@ -35,14 +30,15 @@ for i in range(1, 4):
         "status": "queued",
         "queued_at": time.time()
     }
-    with scheduler.lock:
-        scheduler.task_queue.append(task)
-        print(f"   ✅ Added task_{i}")
+    scheduler.enqueue(task)
+    print(f"   ✅ Added task_{i}")
 
 # Mock submit_to_gpu to return True (success) but NOT start monitoring
 assignments = []
+assignments_lock = threading.Lock()
 def mock_submit(video, audio, tid, gid):
-    assignments.append((tid, gid))
+    with assignments_lock:
+        assignments.append((tid, gid))
     print(f"   📌 submit_to_gpu: {tid} → GPU {gid}")
     return True  # SUCCESS!
 
@@ -57,14 +53,16 @@ def mock_monitor(*args, **kwargs):
 scheduler.submit_to_gpu = mock_submit
 scheduler.monitor_task = mock_monitor
 
-# Process all 3 tasks
-print("\n2️⃣ Processing 3 tasks sequentially:")
-for i in range(3):
-    print(f"\n   Call {i+1} to process_next_in_queue():")
-    scheduler.process_next_in_queue()
-    with scheduler.lock:
-        busy_gpus = [g for g in [0, 1, 2] if scheduler.gpu_config[g]["busy"]]
-        print(f"   📊 Busy GPUs after call {i+1}: {busy_gpus}")
+with scheduler.lock:
+    placed = {t["task_id"]: g for g, q in enumerate(scheduler.worker_queues) for t in q}
+
+# Process all 3 tasks - the three calls race, like concurrent requests would
+print("\n2️⃣ Processing 3 tasks concurrently:")
+with ThreadPoolExecutor(max_workers=3) as ex:
+    list(ex.map(lambda _: scheduler.process_next_in_queue(), range(3)))
+with scheduler.lock:
+    busy_gpus = [g for g in [0, 1, 2] if scheduler.busy[g]]
+    print(f"   📊 Busy GPUs after 3 concurrent calls: {busy_gpus}")
 
 # Restore original functions
 scheduler.submit_to_gpu = original_submit
@@ -86,17 +84,18 @@ else:
     print(f"   ❌ FAILED: GPUs used = {assigned_gpus}")
     print(f"   Expected: Each task on different GPU")
 
+# Each GPU serves its own deque first, so every task runs where it was placed
+stolen = [(tid, gid) for tid, gid in assignments if placed[tid] != gid]
+still_queued = [t["task_id"] for t in scheduler.task_queue]
+if not stolen and len(still_queued) == 2:
+    print(f"   ✅ Each task ran on the GPU whose deque it joined; still queued: {still_queued}")
+else:
+    print(f"   ❌ Placement ignored: {stolen} (placed {placed}), still queued {still_queued}")
+
 # Show final GPU states
 with scheduler.lock:
     print(f"\n5️⃣ Final GPU busy states:")
     for gid in [0, 1, 2]:
-        print(f"   GPU {gid}: {'BUSY' if scheduler.gpu_config[gid]['busy'] else 'FREE'}")
-
-# Cleanup
-with scheduler.lock:
-    scheduler.task_queue.clear()
-    scheduler.active_tasks.clear()
-    for gpu_id in [0, 1, 2]:
-        scheduler.gpu_config[gpu_id]["busy"] = False
+        print(f"   GPU {gid}: {'BUSY' if scheduler.busy[gid] else 'FREE'}")
 
 print("=" * 80)
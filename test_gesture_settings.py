@@ -4,18 +4,45 @@ Test Different HeyGem Gesture Settings
 Tests chaofen parameter (0, 1, 2) to see gesture variation
 """
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import time
-import subprocess
 import os
 import sys
+import threading
 from datetime import datetime
+from urllib.parse import quote
+from file_utils import fast_copy, link_or_copy
+
+try:
+    from inotify_simple import INotify, flags
+    INOTIFY_AVAILABLE = True
+except ImportError:
+    INOTIFY_AVAILABLE = False
+
+try:
+    from requests_unixsocket import UnixAdapter
+except ImportError:
+    UnixAdapter = None
+
+# Keep-alive pool for submit and every progress poll
+session = requests.Session()
+session.headers.update({"Connection": "keep-alive"})
+session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+if UnixAdapter is not None:
+    session.mount("http+unix://", UnixAdapter())
 
 # Configuration
 VIDEO_FILE = "input_video02.mp4"
 AUDIO_FILE = "modi.wav"
 GPU_ID = 0
 GPU_PORT = 8390
+# GPU container's API over its bind-mounted UNIX socket when present, else loopback TCP
+GPU_SOCK = os.environ.get("HEYGEM_SOCK", f"/var/run/heygem_gpu{GPU_ID}.sock")
+if UnixAdapter is not None and os.path.exists(GPU_SOCK):
+    API_BASE = f"http+unix://{quote(GPU_SOCK, safe='')}"
+else:
+    API_BASE = f"http://127.0.0.1:{GPU_PORT}"
 
 # Get chaofen value from command line or use default
 CHAOFEN = int(sys.argv[1]) if len(sys.argv) > 1 else 0
@@ -40,8 +67,9 @@ gpu_data_dir = os.path.expanduser("~/heygem_data/gpu0/face2face/")
 os.makedirs(gpu_data_dir, exist_ok=True)
 
 try:
-    subprocess.run(['cp', f'/nvme0n1-disk/HeyGem/{VIDEO_FILE}', gpu_data_dir], check=True)
-    subprocess.run(['cp', f'/nvme0n1-disk/HeyGem/{AUDIO_FILE}', gpu_data_dir], check=True)
+    # Hardlinks when on the same filesystem, copies otherwise
+    link_or_copy(f'/nvme0n1-disk/HeyGem/{VIDEO_FILE}', os.path.join(gpu_data_dir, VIDEO_FILE))
+    link_or_copy(f'/nvme0n1-disk/HeyGem/{AUDIO_FILE}', os.path.join(gpu_data_dir, AUDIO_FILE))
     print("   ✅ Files copied successfully")
 except Exception as e:
     print(f"   ❌ Error copying files: {e}")
@@ -63,8 +91,8 @@ payload = {
 print(f"   Payload: {json.dumps(payload, indent=2)}")
 
 try:
-    response = requests.post(
-        f"http://127.0.0.1:{GPU_PORT}/easy/submit",
+    response = session.post(
+        f"{API_BASE}/easy/submit",
         json=payload,
         timeout=30
     )
@@ -85,66 +113,21 @@ except Exception as e:
 
 # Monitor progress
 print("\n⏳ Monitoring progress...")
-print("   💡 Will check every 30 seconds (use Ctrl+C to stop)\n")
+print("   💡 Progress every 30 seconds; completion is detected from the output file (use Ctrl+C to stop)\n")
 
-output_file = os.path.expanduser(f"~/heygem_data/gpu0/temp/{TASK_CODE}-r.mp4")
-elapsed = 0
+output_dir = os.path.expanduser("~/heygem_data/gpu0/temp")
+output_name = f"{TASK_CODE}-r.mp4"
+output_file = os.path.join(output_dir, output_name)
 check_interval = 30
+stop_progress = threading.Event()
 
-while True:
-    try:
-        # Check if output file exists
-        if os.path.exists(output_file):
-            # Wait for file write completion
-            print("\n⏳ Video file detected! Waiting for complete write...")
-            time.sleep(5)
-            
-            # Verify file size stability
-            size1 = os.path.getsize(output_file)
-            time.sleep(2)
-            size2 = os.path.getsize(output_file)
-            
-            if size1 != size2:
-                print("⚠️  File still being written, waiting 10 more seconds...")
-                time.sleep(10)
-            
-            end_time = time.time()
-            total_time = end_time - start_time
-            file_size = os.path.getsize(output_file) / (1024 * 1024)
-            
-            print("\n" + "=" * 80)
-            print("✅ VIDEO GENERATION COMPLETE!")
-            print("=" * 80)
-            print(f"⏱️  Total Time: {total_time/60:.2f} minutes")
-            print(f"📁 Source: {output_file}")
-            print(f"📊 Size: {file_size:.1f} MB")
-            print("=" * 80)
-            
-            # Copy to main directory with specific name
-            print(f"\n📋 Copying to /nvme0n1-disk/HeyGem/{OUTPUT_NAME}...")
-            subprocess.run([
-                'cp',
-                output_file,
-                f"/nvme0n1-disk/HeyGem/{OUTPUT_NAME}"
-            ])
-            
-            # Verify copy
-            copied_size = os.path.getsize(f"/nvme0n1-disk/HeyGem/{OUTPUT_NAME}") / (1024 * 1024)
-            if abs(copied_size - file_size) < 0.1:
-                print(f"✅ Copy verified: {OUTPUT_NAME} ({copied_size:.1f} MB)")
-            else:
-                print(f"⚠️  Copy size mismatch! Original: {file_size:.1f} MB, Copied: {copied_size:.1f} MB")
-            
-            print("\n" + "=" * 80)
-            print(f"🎉 Test completed for CHAOFEN={CHAOFEN}")
-            print(f"📹 Output: /nvme0n1-disk/HeyGem/{OUTPUT_NAME}")
-            print("=" * 80)
-            break
-        
-        # Check API progress
+def print_progress():
+    """Print API progress every check_interval (informational only, never gates completion)"""
+    elapsed = 0
+    while True:
         try:
-            response = requests.get(
-                f"http://127.0.0.1:{GPU_PORT}/easy/query?code={TASK_CODE}",
+            response = session.get(
+                f"{API_BASE}/easy/query?code={TASK_CODE}",
                 timeout=10
             )
             
@@ -157,13 +140,84 @@ while True:
         except Exception as e:
             print(f"[{elapsed:4d}s] Monitoring... (API check failed)")
         
-        time.sleep(check_interval)
+        if stop_progress.wait(check_interval):
+            return
         elapsed += check_interval
-        
-    except KeyboardInterrupt:
-        print(f"\n\n⚠️  Monitoring stopped by user")
-        print(f"   Task continues in background!")
-        print(f"   Check: {output_file}")
-        break
+
+def wait_for_output():
+    """
+    Block until the output video exists. With inotify this wakes on the encoder's
+    close-after-write and returns True (the file is complete); otherwise polls
+    every check_interval and returns False (size stability still has to be checked).
+    """
+    if INOTIFY_AVAILABLE:
+        os.makedirs(output_dir, exist_ok=True)
+        inotify = INotify()
+        try:
+            inotify.add_watch(output_dir, flags.CLOSE_WRITE | flags.MOVED_TO)
+            # It may have landed before the watch was added
+            if os.path.exists(output_file):
+                return False
+            while True:
+                if any(event.name == output_name for event in inotify.read()):
+                    return True
+        finally:
+            inotify.close()
+    
+    while not os.path.exists(output_file):
+        time.sleep(check_interval)
+    return False
+
+threading.Thread(target=print_progress, daemon=True).start()
+
+try:
+    closed = wait_for_output()
+    stop_progress.set()
+    
+    st = os.stat(output_file)
+    if not closed:
+        # Wait for file write completion: one stat per probe, done once
+        # neither size nor mtime moved in the last second
+        print("\n⏳ Video file detected! Waiting for complete write...")
+        while True:
+            time.sleep(1)
+            st_next = os.stat(output_file)
+            if (st_next.st_size, st_next.st_mtime_ns) == (st.st_size, st.st_mtime_ns):
+                break
+            st = st_next
+    
+    end_time = time.time()
+    total_time = end_time - start_time
+    file_size = st.st_size / (1024 * 1024)
+    
+    print("\n" + "=" * 80)
+    print("✅ VIDEO GENERATION COMPLETE!")
+    print("=" * 80)
+    print(f"⏱️  Total Time: {total_time/60:.2f} minutes")
+    print(f"📁 Source: {output_file}")
+    print(f"📊 Size: {file_size:.1f} MB")
+    print("=" * 80)
+    
+    # Copy to main directory with specific name
+    print(f"\n📋 Copying to /nvme0n1-disk/HeyGem/{OUTPUT_NAME}...")
+    # In-kernel copy (reflink / copy_file_range / sendfile), no cp fork
+    copied_size = fast_copy(output_file, f"/nvme0n1-disk/HeyGem/{OUTPUT_NAME}") / (1024 * 1024)
+    
+    # Verify copy
+    if abs(copied_size - file_size) < 0.1:
+        print(f"✅ Copy verified: {OUTPUT_NAME} ({copied_size:.1f} MB)")
+    else:
+        print(f"⚠️  Copy size mismatch! Original: {file_size:.1f} MB, Copied: {copied_size:.1f} MB")
+    
+    print("\n" + "=" * 80)
+    print(f"🎉 Test completed for CHAOFEN={CHAOFEN}")
+    print(f"📹 Output: /nvme0n1-disk/HeyGem/{OUTPUT_NAME}")
+    print("=" * 80)
+    
+except KeyboardInterrupt:
+    stop_progress.set()
+    print(f"\n\n⚠️  Monitoring stopped by user")
+    print(f"   Task continues in background!")
+    print(f"   Check: {output_file}")
 
 print("\n🏁 Done!")
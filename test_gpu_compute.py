@@ -5,88 +5,115 @@ Tests if GPU 1 and GPU 2 can actually run CUDA computations
 """
 import torch
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-def test_gpu(gpu_id):
-    """Test a specific GPU with matrix multiplication"""
-    print(f"\n{'='*60}")
-    print(f"Testing GPU {gpu_id}")
-    print(f"{'='*60}")
+def test_gpu(gpu_id, log=print):
+    """Test a specific GPU with matrix multiplication (output goes through `log`)"""
+    log(f"\n{'='*60}")
+    log(f"Testing GPU {gpu_id}")
+    log(f"{'='*60}")
     
     if not torch.cuda.is_available():
-        print(f"❌ CUDA not available!")
+        log(f"❌ CUDA not available!")
         return False
     
     device_count = torch.cuda.device_count()
-    print(f"Total CUDA devices: {device_count}")
+    log(f"Total CUDA devices: {device_count}")
     
     if gpu_id >= device_count:
-        print(f"❌ GPU {gpu_id} not found (only {device_count} devices available)")
+        log(f"❌ GPU {gpu_id} not found (only {device_count} devices available)")
         return False
     
     try:
-        # Set device
+        # Set device (graph capture below runs on the current device)
         device = torch.device(f'cuda:{gpu_id}')
-        print(f"✅ Device: {torch.cuda.get_device_name(gpu_id)}")
+        torch.cuda.set_device(device)
+        # Same Tensor Core paths as production inference (TF32 for any fp32 work)
+        torch.backends.cuda.matmul.allow_tf32 = True
+        torch.backends.cudnn.allow_tf32 = True
+        log(f"✅ Device: {torch.cuda.get_device_name(gpu_id)}")
         
         # Allocate memory
-        print(f"\n🧪 Running compute test...")
+        log(f"\n🧪 Running compute test...")
         size = 5000
         
-        # Create large tensors
-        a = torch.randn(size, size, device=device)
-        b = torch.randn(size, size, device=device)
+        # Create large tensors (bf16, like HeyGem's inference)
+        a = torch.randn(size, size, device=device, dtype=torch.bfloat16)
+        b = torch.randn(size, size, device=device, dtype=torch.bfloat16)
         
-        # Warm up
-        _ = torch.matmul(a, b)
+        # Output buffer allocated once; every matmul writes into it
+        c = torch.empty(size, size, device=device, dtype=a.dtype)
+        
+        # Warm up on a side stream (required before CUDA graph capture)
+        stream = torch.cuda.Stream(device)
+        stream.wait_stream(torch.cuda.current_stream(device))
+        with torch.cuda.stream(stream):
+            torch.matmul(a, b, out=c)
+        torch.cuda.current_stream(device).wait_stream(stream)
+        
+        # Capture the matmul once; each replay is a single cheap graph launch.
+        # thread_local: the other GPUs' probe threads keep allocating and syncing
+        # while this one captures, which the default "global" mode forbids
+        graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(graph, capture_error_mode="thread_local"):
+            torch.matmul(a, b, out=c)
         torch.cuda.synchronize(device)
         
-        # Timed test
+        # Timed test: 10 replays back to back, one sync at the end
         start = time.time()
-        for i in range(10):
-            c = torch.matmul(a, b)
-            torch.cuda.synchronize(device)
-            if i % 3 == 0:
-                print(f"   Iteration {i+1}/10 complete")
+        for _ in range(10):
+            graph.replay()
+        torch.cuda.synchronize(device)
         
         elapsed = time.time() - start
+        # Reported after the timed region so logging never skews it
+        log(f"   10/10 iterations complete")
+        tflops = 2 * size**3 * 10 / elapsed / 1e12
         
         # Check memory
         mem_allocated = torch.cuda.memory_allocated(device) / 1024**2
         mem_reserved = torch.cuda.memory_reserved(device) / 1024**2
         
-        print(f"\n✅ GPU {gpu_id} Test PASSED!")
-        print(f"   Time: {elapsed:.2f}s for 10 iterations")
-        print(f"   Memory allocated: {mem_allocated:.1f} MB")
-        print(f"   Memory reserved: {mem_reserved:.1f} MB")
+        log(f"\n✅ GPU {gpu_id} Test PASSED!")
+        log(f"   Time: {elapsed:.2f}s for 10 iterations ({tflops:.1f} TFLOPS bf16)")
+        log(f"   Memory allocated: {mem_allocated:.1f} MB")
+        log(f"   Memory reserved: {mem_reserved:.1f} MB")
         
         # Cleanup
-        del a, b, c
+        del a, b, c, graph
         torch.cuda.empty_cache()
         
         return True
         
     except Exception as e:
-        print(f"\n❌ GPU {gpu_id} Test FAILED!")
-        print(f"   Error: {e}")
+        log(f"\n❌ GPU {gpu_id} Test FAILED!")
+        log(f"   Error: {e}")
         import traceback
-        traceback.print_exc()
+        log(traceback.format_exc())
         return False
 
+def test_gpu_buffered(gpu_id):
+    """Run test_gpu and keep its output, so concurrent probes don't interleave"""
+    lines = []
+    passed = test_gpu(gpu_id, log=lines.append)
+    return passed, lines
+
 if __name__ == "__main__":
     print("="*60)
     print("GPU Compute Test - Testing GPU 1 and GPU 2")
     print("="*60)
     
-    results = {}
-    
-    # Test GPU 1
-    results[1] = test_gpu(1)
+    # GPU 1, GPU 2, and GPU 0 for comparison - all at once, one thread per device
+    # (PyTorch drops the GIL inside CUDA calls), so wall time is the slowest probe
+    gpu_ids = [1, 2, 0]
+    with ThreadPoolExecutor(max_workers=len(gpu_ids)) as ex:
+        outcomes = list(ex.map(test_gpu_buffered, gpu_ids))
     
-    # Test GPU 2
-    results[2] = test_gpu(2)
-    
-    # Test GPU 0 for comparison
-    results[0] = test_gpu(0)
+    results = {}
+    for gpu_id, (passed, lines) in zip(gpu_ids, outcomes):
+        for line in lines:
+            print(line)
+        results[gpu_id] = passed
     
     # Summary
     print("\n" + "="*60)
@@ -21,7 +21,7 @@ for key, value in status.items():
 print("\n2️⃣ GPU Configuration:")
 with scheduler.lock:
     for gpu_id, config in scheduler.gpu_config.items():
-        print(f"   GPU {gpu_id}: Port={config['port']}, Busy={config['busy']}")
+        print(f"   GPU {gpu_id}: Port={config['port']}, Busy={scheduler.busy[gpu_id]}")
 
 # Test find_available_gpu
 print("\n3️⃣ Testing find_available_gpu():")
@@ -41,7 +41,7 @@ with scheduler.lock:
 print("\n5️⃣ Checking for stuck GPUs:")
 with scheduler.lock:
     for gpu_id in [0, 1, 2]:
-        is_busy = scheduler.gpu_config[gpu_id]["busy"]
+        is_busy = scheduler.busy[gpu_id]
         # Check if there's actually a task running on this GPU
         tasks_on_gpu = [t for t_id, t in scheduler.active_tasks.items() 
                        if t.get('gpu_id') == gpu_id and t.get('status') == 'running']
@@ -5,20 +5,40 @@ Simple script to test video generation API
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import time
 import sys
+import os
+from urllib.parse import quote
+
+try:
+    from requests_unixsocket import UnixAdapter
+except ImportError:
+    UnixAdapter = None
 
 # API Configuration
-BASE_URL = "http://127.0.0.1:8383"
+# Talk over the container's UNIX socket when it is bind-mounted (no loopback TCP), else TCP
+HEYGEM_SOCK = os.environ.get("HEYGEM_SOCK", "/var/run/heygem.sock")
+if UnixAdapter is not None and os.path.exists(HEYGEM_SOCK):
+    BASE_URL = f"http+unix://{quote(HEYGEM_SOCK, safe='')}"
+else:
+    BASE_URL = "http://127.0.0.1:8383"
 SUBMIT_ENDPOINT = f"{BASE_URL}/easy/submit"
 QUERY_ENDPOINT = f"{BASE_URL}/easy/query"
 
+# One keep-alive pool for the connection test, submit and every progress poll
+session = requests.Session()
+session.headers.update({"Connection": "keep-alive"})
+session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+if UnixAdapter is not None:
+    session.mount("http+unix://", UnixAdapter())
+
 def test_api_connection():
     """Test if API is accessible"""
     print("🔍 Testing API connection...")
     try:
-        response = requests.get(BASE_URL, timeout=5)
+        response = session.get(BASE_URL, timeout=5)
         print(f"✅ API is running (Status: {response.status_code})")
         return True
     except requests.exceptions.RequestException as e:
@@ -49,7 +69,7 @@ def submit_video_task(audio_path, video_path, task_code="test_001"):
     }
     
     try:
-        response = requests.post(
+        response = session.post(
             SUBMIT_ENDPOINT,
             json=payload,
             headers={"Content-Type": "application/json"},
@@ -74,7 +94,7 @@ def check_task_progress(task_code):
     print(f"\n🔄 Checking progress for task: {task_code}")
     
     try:
-        response = requests.get(
+        response = session.get(
             f"{QUERY_ENDPOINT}?code={task_code}",
             timeout=10
         )
@@ -94,12 +114,15 @@ def monitor_task(task_code, max_wait=300, check_interval=5):
     Args:
         task_code: Task identifier
         max_wait: Maximum wait time in seconds (default: 5 minutes)
-        check_interval: Seconds between checks (default: 5)
+        check_interval: Longest gap between checks (default: 5); polls start at 0.5s,
+            double while progress stands still and drop back to 0.5s when it moves
     """
     print(f"\n⏳ Monitoring task {task_code}...")
-    print(f"   Max wait: {max_wait}s, Check interval: {check_interval}s")
+    print(f"   Max wait: {max_wait}s, Check interval: 0.5-{check_interval}s")
     
     elapsed = 0
+    interval = 0.5
+    last_progress = None
     while elapsed < max_wait:
         result = check_task_progress(task_code)
         
@@ -108,14 +131,20 @@ def monitor_task(task_code, max_wait=300, check_interval=5):
             status = result.get('status', '')
             progress = result.get('progress', 0)
             
-            print(f"   [{elapsed}s] Status: {status}, Progress: {progress}%")
+            print(f"   [{elapsed:.1f}s] Status: {status}, Progress: {progress}%")
             
             if status == 'completed' or progress == 100:
                 print(f"✅ Task completed!")
                 return result
+            
+            if progress != last_progress:
+                interval = 0.5
+                last_progress = progress
+            else:
+                interval = min(interval * 2, check_interval)
         
-        time.sleep(check_interval)
-        elapsed += check_interval
+        time.sleep(interval)
+        elapsed += interval
     
     print(f"⏰ Timeout after {max_wait}s")
     return None
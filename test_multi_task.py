@@ -7,6 +7,14 @@ sys.path.insert(0, '/nvme0n1-disk/nvme01/HeyGem/webapp')
 
 from gpu_scheduler import scheduler
 import time
+from output_buffer import buffer_stdout
+
+buffer_stdout()
+
+def set_busy(gpu_id, busy):
+    """Flip one GPU's busy flag (print after the lock is released)"""
+    with scheduler.lock:
+        scheduler.busy[gpu_id] = busy
 
 print("=" * 80)
 print("🔍 Testing Multi-Task GPU Assignment")
@@ -15,37 +23,33 @@ print("=" * 80)
 # Simulate marking GPUs as busy (as if tasks are running)
 print("\n1️⃣ Simulating 3 concurrent tasks:")
 
-with scheduler.lock:
-    # Manually mark GPU 0 as busy
-    scheduler.gpu_config[0]["busy"] = True
-    print(f"   Marked GPU 0 as BUSY")
+# Manually mark GPU 0 as busy
+set_busy(0, True)
+print("   Marked GPU 0 as BUSY")
 
 # Now test which GPU is returned
 available = scheduler.find_available_gpu()
 print(f"   With GPU 0 busy, find_available_gpu() returns: GPU {available}")
 
-with scheduler.lock:
-    # Mark GPU 1 as busy too
-    scheduler.gpu_config[1]["busy"] = True
-    print(f"   Marked GPU 1 as BUSY")
+# Mark GPU 1 as busy too
+set_busy(1, True)
+print("   Marked GPU 1 as BUSY")
 
 available = scheduler.find_available_gpu()
 print(f"   With GPU 0,1 busy, find_available_gpu() returns: GPU {available}")
 
-with scheduler.lock:
-    # Mark all GPUs as busy
-    scheduler.gpu_config[2]["busy"] = True
-    print(f"   Marked GPU 2 as BUSY")
+# Mark all GPUs as busy
+set_busy(2, True)
+print("   Marked GPU 2 as BUSY")
 
 available = scheduler.find_available_gpu()
 print(f"   With all GPUs busy, find_available_gpu() returns: {available}")
 
 # Reset all GPUs
 print("\n2️⃣ Resetting all GPUs to FREE state:")
-with scheduler.lock:
-    for gpu_id in [0, 1, 2]:
-        scheduler.gpu_config[gpu_id]["busy"] = False
-        print(f"   GPU {gpu_id} → FREE")
+for gpu_id in [0, 1, 2]:
+    set_busy(gpu_id, False)
+    print(f"   GPU {gpu_id} → FREE")
 
 print("\nConclusion:")
 print("   The find_available_gpu() logic works correctly!")
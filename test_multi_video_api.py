@@ -2,17 +2,19 @@
 """
 Test if HeyGem API supports multiple input videos
 """
-import requests
+import asyncio
 import json
 
+import aiohttp
+
 print("=" * 80)
 print("🧪 Testing HeyGem API - Multiple Video Input Support")
 print("=" * 80)
 
 API_URL = "http://localhost:8390/easy/submit"
+QUERY_URL = "http://localhost:8390/easy/query"
 
 # Test 1: Single video (current method)
-print("\n1️⃣ Test 1: Single video (baseline)")
 payload_single = {
     "audio_url": "/code/data/face2face/modi.wav",
     "video_url": "/code/data/face2face/input_video02.mp4",
@@ -22,22 +24,7 @@ payload_single = {
     "pn": 1
 }
 
-print(f"Payload: {json.dumps(payload_single, indent=2)}")
-
-try:
-    response = requests.post(API_URL, json=payload_single, timeout=10)
-    print(f"Status: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}")
-    
-    if response.json().get('success'):
-        print("✅ Single video: WORKS")
-        # Cancel this task
-        requests.get(f"http://localhost:8390/easy/query?code=test_single_video")
-except Exception as e:
-    print(f"❌ Error: {e}")
-
 # Test 2: Multiple videos as array
-print("\n2️⃣ Test 2: Multiple videos (video_urls array)")
 payload_multi_array = {
     "audio_url": "/code/data/face2face/modi.wav",
     "video_urls": [  # Trying array instead of single URL
@@ -50,22 +37,7 @@ payload_multi_array = {
     "pn": 1
 }
 
-print(f"Payload: {json.dumps(payload_multi_array, indent=2)}")
-
-try:
-    response = requests.post(API_URL, json=payload_multi_array, timeout=10)
-    print(f"Status: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}")
-    
-    if response.json().get('success'):
-        print("✅ Multiple videos (array): WORKS!")
-    else:
-        print("❌ Multiple videos (array): NOT SUPPORTED or ERROR")
-except Exception as e:
-    print(f"❌ Error: {e}")
-
 # Test 3: Multiple videos as comma-separated string
-print("\n3️⃣ Test 3: Multiple videos (comma-separated string)")
 payload_multi_string = {
     "audio_url": "/code/data/face2face/modi.wav",
     "video_url": "/code/data/face2face/input_video02.mp4,/code/data/face2face/input_video.mp4",
@@ -75,22 +47,7 @@ payload_multi_string = {
     "pn": 1
 }
 
-print(f"Payload: {json.dumps(payload_multi_string, indent=2)}")
-
-try:
-    response = requests.post(API_URL, json=payload_multi_string, timeout=10)
-    print(f"Status: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}")
-    
-    if response.json().get('success'):
-        print("✅ Multiple videos (string): WORKS!")
-    else:
-        print("❌ Multiple videos (string): NOT SUPPORTED or ERROR")
-except Exception as e:
-    print(f"❌ Error: {e}")
-
 # Test 4: Check for video_list parameter
-print("\n4️⃣ Test 4: video_list parameter")
 payload_video_list = {
     "audio_url": "/code/data/face2face/modi.wav",
     "video_list": [
@@ -103,19 +60,63 @@ payload_video_list = {
     "pn": 1
 }
 
-print(f"Payload: {json.dumps(payload_video_list, indent=2)}")
-
-try:
-    response = requests.post(API_URL, json=payload_video_list, timeout=10)
-    print(f"Status: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}")
-    
-    if response.json().get('success'):
-        print("✅ video_list parameter: WORKS!")
-    else:
-        print("❌ video_list parameter: NOT SUPPORTED or ERROR")
-except Exception as e:
-    print(f"❌ Error: {e}")
+# (heading, payload, message if it works, message if not)
+PROBES = [
+    ("1️⃣ Test 1: Single video (baseline)", payload_single,
+     "✅ Single video: WORKS", None),
+    ("2️⃣ Test 2: Multiple videos (video_urls array)", payload_multi_array,
+     "✅ Multiple videos (array): WORKS!", "❌ Multiple videos (array): NOT SUPPORTED or ERROR"),
+    ("3️⃣ Test 3: Multiple videos (comma-separated string)", payload_multi_string,
+     "✅ Multiple videos (string): WORKS!", "❌ Multiple videos (string): NOT SUPPORTED or ERROR"),
+    ("4️⃣ Test 4: video_list parameter", payload_video_list,
+     "✅ video_list parameter: WORKS!", "❌ video_list parameter: NOT SUPPORTED or ERROR"),
+]
+
+
+async def probe(session, payload):
+    """Submit one payload; returns (status, json body) or the exception"""
+    try:
+        async with session.post(API_URL, json=payload) as response:
+            return response.status, await response.json(content_type=None)
+    except Exception as e:
+        return e
+
+
+async def run_probes():
+    """All four submits at once on one keep-alive pool (they share no state)"""
+    timeout = aiohttp.ClientTimeout(total=10)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        results = await asyncio.gather(*(probe(session, payload) for _, payload, _, _ in PROBES))
+        # Cancel the baseline task if it was accepted
+        baseline = results[0]
+        if not isinstance(baseline, Exception) and baseline[1].get('success'):
+            try:
+                async with session.get(QUERY_URL, params={"code": payload_single["code"]}) as response:
+                    await response.read()
+            except Exception:
+                pass
+        return results
+
+
+results = asyncio.run(run_probes())
+
+# Report in test order
+for (heading, payload, ok_msg, fail_msg), result in zip(PROBES, results):
+    print(f"\n{heading}")
+    print(f"Payload: {json.dumps(payload, indent=2)}")
+
+    if isinstance(result, Exception):
+        print(f"❌ Error: {result}")
+        continue
+
+    status, body = result
+    print(f"Status: {status}")
+    print(f"Response: {json.dumps(body, indent=2)}")
+
+    if body.get('success'):
+        print(ok_msg)
+    elif fail_msg:
+        print(fail_msg)
 
 print("\n" + "=" * 80)
 print("📝 Test Summary:")
@@ -8,6 +8,9 @@ sys.path.insert(0, '/nvme0n1-disk/nvme01/HeyGem/webapp')
 from gpu_scheduler import scheduler
 import threading
 import time
+from output_buffer import buffer_stdout
+
+buffer_stdout()
 
 print("=" * 80)
 print("🐛 RACE CONDITION DEMONSTRATION")
@@ -30,8 +33,7 @@ def add_dummy_task(task_num):
         "queued_at": time.time()
     }
     
-    with scheduler.lock:
-        scheduler.task_queue.append(task)
+    scheduler.enqueue(task)
     print(f"   Added {task_id} to queue")
 
 # Add 3 tasks
@@ -48,8 +50,8 @@ print("   This will demonstrate the race condition...")
 results = []
 
 def test_process():
-    """Wrapper to capture which GPU is selected"""
-    gpu_id = scheduler.find_available_gpu()
+    """Wrapper to capture which GPU is claimed (find + mark busy in one step)"""
+    gpu_id = scheduler.claim_available_gpu()
     results.append(gpu_id)
     print(f"   Thread {threading.current_thread().name}: Got GPU {gpu_id}")
     time.sleep(0.1)  # Small delay to let all threads run
@@ -72,14 +74,18 @@ print(f"   GPUs assigned: {results}")
 print(f"   Expected: [0, 1, 2] (one GPU per thread)")
 print(f"   Actual: {results}")
 
-if results == [0, 0, 0]:
-    print("\n   ⚠️  BUG CONFIRMED: All threads got GPU 0!")
-    print("   This is the RACE CONDITION causing only GPU 0 to be used.")
+if sorted(results) == [0, 1, 2]:
+    print("\n   ✅ No race condition: each thread claimed a different GPU")
 else:
-    print("\n   ✅ No race condition detected (all got same free GPU)")
+    print("\n   ⚠️  BUG CONFIRMED: threads shared a GPU!")
+    print("   This is the RACE CONDITION causing only GPU 0 to be used.")
 
 # Cleanup
+for gpu_id in results:
+    if gpu_id is not None:
+        scheduler.release_gpu(gpu_id)
 with scheduler.lock:
-    scheduler.task_queue.clear()
+    for q in scheduler.worker_queues:
+        q.clear()
 
 print("=" * 80)
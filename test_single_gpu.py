@@ -3,6 +3,8 @@
 Simple Test: Generate video using existing audio and video files
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import time
 import sys
@@ -16,6 +18,12 @@ GPU_PORT = 8390  # GPU 0
 BASE_URL = f"http://127.0.0.1:{GPU_PORT}"
 TASK_CODE = f"test_{int(time.time())}"
 
+# One keep-alive pool for every call; connection failures retry with backoff
+session = requests.Session()
+session.headers.update({"Connection": "keep-alive"})
+session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=8,
+                                     max_retries=Retry(total=3, backoff_factor=0.2)))
+
 print("=" * 70)
 print("🎬 HeyGem Single GPU Test")
 print("=" * 70)
@@ -38,7 +46,7 @@ payload = {
 }
 
 try:
-    response = requests.post(
+    response = session.post(
         f"{BASE_URL}/easy/submit",
         json=payload,
         headers={"Content-Type": "application/json"},
@@ -64,11 +72,15 @@ print("\n⏳ Monitoring progress (this may take a few minutes)...\n")
 
 max_wait = 600  # 10 minutes
 check_interval = 5
+# Back off from 250 ms to check_interval: quick tasks are seen finishing almost
+# immediately, long ones settle at one query every check_interval
+interval = 0.25
+start = time.monotonic()
 elapsed = 0
 
 while elapsed < max_wait:
     try:
-        response = requests.get(
+        response = session.get(
             f"{BASE_URL}/easy/query?code={TASK_CODE}",
             timeout=10
         )
@@ -78,7 +90,7 @@ while elapsed < max_wait:
         progress = task_data.get('progress', 0)
         status = task_data.get('status', 'unknown')
         
-        print(f"[{elapsed:3d}s] Progress: {progress}% | Status: {status}")
+        print(f"[{elapsed:5.1f}s] Progress: {progress}% | Status: {status}")
         
         # Check if completed
         if progress >= 100 or status == 'completed':
@@ -89,13 +101,12 @@ while elapsed < max_wait:
             print(f"   File name: {TASK_CODE}-r.mp4")
             break
         
-        time.sleep(check_interval)
-        elapsed += check_interval
-        
     except Exception as e:
         print(f"   Error: {e}")
-        time.sleep(check_interval)
-        elapsed += check_interval
+    
+    time.sleep(interval)
+    interval = min(interval * 1.5, check_interval)
+    elapsed = time.monotonic() - start
 
 if elapsed >= max_wait:
     print(f"\n⏰ Timeout after {max_wait} seconds")
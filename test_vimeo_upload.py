@@ -3,15 +3,21 @@
 Simple Vimeo Upload Test
 """
 import sys
+import os
+import asyncio
+import aiohttp
 import vimeo
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploader'))
+from vimeo_api import create_tus_video, tus_upload
+
 # Configuration
 CLIENT_ID = "dca4c491c5bac1f0619df145bcca3e47791108cd"
 CLIENT_SECRET = "8R6A46tJ9E+1GIv9fySV+Z5/2SkXVHSowhSicLoh8ibWPbF4Tk8cUiIrJ2iE74JbX47oTYon8vV33sAnazTlcHxqPyayLpljl5y6WmN6F6y33ByHmyoXpthRkeqQzWyU"
 ACCESS_TOKEN = "66b9924a59f44740dc427fd91f633b84"
 
-def test_upload(video_path):
-    """Test Vimeo upload with new token"""
+async def test_upload(session, video_path):
+    """Test Vimeo upload with new token (resumable tus upload over the shared session)"""
     print(f"\n{'='*60}")
     print(f"🎬 Testing Vimeo Upload")
     print(f"{'='*60}")
@@ -28,33 +34,40 @@ def test_upload(video_path):
         print(f"📤 Uploading to Vimeo...")
         
         # Upload
-        uri = client.upload(video_path, data={
+        uri, upload_link = await create_tus_video(session, ACCESS_TOKEN, video_path, {
             'name': 'HeyGem Test Upload',
             'description': 'Test video from Triple GPU system',
             'privacy': {'view': 'anybody'}  # Public
         })
+        await tus_upload(session, video_path, upload_link)
         
         print(f"✅ Upload Successful!")
         print(f"   URI: {uri}")
         
         # Get video link
-        video_data = client.get(uri + '?fields=link,name').json()
+        # Blocking client call in a worker thread, so the other uploads keep going
+        response = await asyncio.to_thread(client.get, uri + '?fields=link,name')
+        video_data = response.json()
         print(f"   Link: {video_data.get('link')}")
         print(f"   Name: {video_data.get('name')}")
         
         return True
         
     except Exception as e:
-        print(f"❌ Upload Failed: {e}")
+        print(f"❌ Upload Failed ({video_path}): {e}")
         import traceback
         traceback.print_exc()
         return False
 
+async def main(video_paths):
+    """Upload every video at once, one tus stream each"""
+    async with aiohttp.ClientSession() as session:
+        return await asyncio.gather(*(test_upload(session, path) for path in video_paths))
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python3 test_vimeo_upload.py <video_path>")
+        print("Usage: python3 test_vimeo_upload.py <video_path> [<video_path> ...]")
         sys.exit(1)
     
-    video_path = sys.argv[1]
-    success = test_upload(video_path)
-    sys.exit(0 if success else 1)
+    results = asyncio.run(main(sys.argv[1:]))
+    sys.exit(0 if all(results) else 1)
@@ -4,10 +4,36 @@ Simple Voice Cloning Test
 Tests basic TTS functionality
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import os
 import time
 
+
+def save_audio(response, path):
+    """Stream a TTS response body to path in 64 KB chunks; returns bytes written"""
+    with open(path, "wb") as f:
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            f.write(chunk)
+        return f.tell()
+
+
+def is_audio(response, path, size):
+    """Audio unless the server sent a short non-audio body (then it is printed and dropped)"""
+    if 'audio' in response.headers.get('content-type', '') or size > 1000:
+        return True
+    with open(path) as f:
+        print(f"   Response: {f.read()}")
+    os.remove(path)
+    return False
+
+# One keep-alive pool for every call; connection failures retry with backoff
+session = requests.Session()
+session.headers.update({"Connection": "keep-alive"})
+session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=8,
+                                     max_retries=Retry(total=3, backoff_factor=0.2)))
+
 print("=" * 80)
 print("🎤 HeyGem Voice Cloning - Quick Test")
 print("=" * 80)
@@ -15,7 +41,7 @@ print("=" * 80)
 # Check TTS service health
 print("\n1️⃣ Checking TTS service health...")
 try:
-    health = requests.get("http://localhost:18180/health", timeout=5)
+    health = session.get("http://localhost:18180/health", timeout=5)
     print(f"   ✅ TTS Service Status: {health.json()}")
 except Exception as e:
     print(f"   ❌ TTS service not accessible: {e}")
@@ -35,9 +61,10 @@ test_payload = {
 print(f"   Payload: {json.dumps(test_payload, indent=2)}")
 
 try:
-    response = requests.post(
+    response = session.post(
         "http://localhost:18180/v1/invoke",
         json=test_payload,
+        stream=True,
         timeout=30
     )
     
@@ -48,14 +75,11 @@ try:
         # Save audio
         output_file = "test_tts_output.wav"
         
-        # Check if response is audio or JSON
-        content_type = response.headers.get('content-type', '')
+        # Stream to disk, then check if response is audio or JSON
+        size = save_audio(response, output_file)
         
-        if 'audio' in content_type or len(response.content) > 1000:
-            with open(output_file, "wb") as f:
-                f.write(response.content)
-            
-            file_size = os.path.getsize(output_file) / 1024  # KB
+        if is_audio(response, output_file, size):
+            file_size = size / 1024  # KB
             print(f"   ✅ Audio generated: {output_file} ({file_size:.1f} KB)")
             
             # Copy to data directory for video generation
@@ -63,9 +87,6 @@ try:
             import shutil
             shutil.copy(output_file, os.path.expanduser("~/heygem_data/gpu0/face2face/test_tts_output.wav"))
             print(f"   ✅ Copied to GPU data directory")
-        else:
-            # JSON response
-            print(f"   Response: {response.text}")
     else:
         print(f"   ❌ Request failed: {response.status_code}")
         print(f"   Response: {response.text}")
@@ -110,24 +131,22 @@ if os.path.exists(modi_audio):
     
     try:
         print("\n   🔄 Generating cloned voice (this may take 30-60 seconds)...")
-        clone_response = requests.post(
+        clone_response = session.post(
             "http://localhost:18180/v1/invoke",
             json=clone_payload,
+            stream=True,
             timeout=120  # Longer timeout for voice cloning
         )
         
         print(f"   Status Code: {clone_response.status_code}")
         
         if clone_response.status_code == 200:
-            content_type = clone_response.headers.get('content-type', '')
+            # Save cloned audio
+            cloned_file = "modi_cloned_voice.wav"
+            size = save_audio(clone_response, cloned_file)
             
-            if 'audio' in content_type or len(clone_response.content) > 1000:
-                # Save cloned audio
-                cloned_file = "modi_cloned_voice.wav"
-                with open(cloned_file, "wb") as f:
-                    f.write(clone_response.content)
-                
-                file_size = os.path.getsize(cloned_file) / 1024
+            if is_audio(clone_response, cloned_file, size):
+                file_size = size / 1024
                 print(f"   ✅ Cloned voice generated: {cloned_file} ({file_size:.1f} KB)")
                 
                 # Copy to GPU data directory
@@ -138,8 +157,6 @@ if os.path.exists(modi_audio):
                 print("\n   📹 Next step: Generate video with cloned voice:")
                 print(f"   python3 run_with_stats.py")
                 print(f"   (Edit AUDIO_FILE = 'modi_cloned_voice.wav')")
-            else:
-                print(f"   Response: {clone_response.text}")
         else:
             print(f"   ❌ Cloning failed: {clone_response.status_code}")
             print(f"   Response: {clone_response.text}")
@@ -169,7 +186,7 @@ endpoints_to_try = [
 print("\nTrying endpoints:")
 for endpoint in endpoints_to_try:
     try:
-        resp = requests.get(f"http://localhost:18180{endpoint}", timeout=3)
+        resp = session.get(f"http://localhost:18180{endpoint}", timeout=3)
         if resp.status_code < 500:
             print(f"   ✅ {endpoint} - Status: {resp.status_code}")
     except:
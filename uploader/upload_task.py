@@ -3,6 +3,7 @@ import sys
 import os
 import json
 import argparse
+import asyncio
 from datetime import datetime
 from youtube_api import YouTubeUploader
 from vimeo_api import VimeoUploader
@@ -12,11 +13,12 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_FILE = os.path.join(BASE_DIR, "config.json")
 
 def load_config():
-    if not os.path.exists(CONFIG_FILE):
+    try:
+        with open(CONFIG_FILE, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
         print(f"❌ Config file not found: {CONFIG_FILE}")
         return None
-    with open(CONFIG_FILE, 'r') as f:
-        return json.load(f)
 
 def format_string(template, filename, task_id):
     date_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -26,7 +28,7 @@ def format_string(template, filename, task_id):
         date=date_str
     )
 
-def main():
+async def main():
     parser = argparse.ArgumentParser(description="HeyGem Auto-Uploader")
     parser.add_argument("file_path", help="Path to the video file")
     parser.add_argument("--task_id", default="unknown", help="Task ID associated with the video")
@@ -46,6 +48,9 @@ def main():
     print(f"🚀 Starting Auto-Upload for: {filename}")
     print(f"{'='*60}")
 
+    # YouTube and Vimeo uploads run side by side (each in its own thread)
+    uploads = []
+    
     # YouTube Upload
     yt_config = config.get("youtube", {})
     if yt_config.get("enabled"):
@@ -53,7 +58,7 @@ def main():
         desc = format_string(yt_config.get("description_template", ""), filename, args.task_id)
         
         uploader = YouTubeUploader(yt_config)
-        uploader.upload_video(args.file_path, title, desc)
+        uploads.append(asyncio.to_thread(uploader.upload_video, args.file_path, title, desc))
     else:
         print("⏭️  YouTube upload disabled in config.")
 
@@ -64,13 +69,15 @@ def main():
         desc = format_string(vim_config.get("description_template", ""), filename, args.task_id)
         
         uploader = VimeoUploader(vim_config)
-        uploader.upload_video(args.file_path, title, desc)
+        uploads.append(asyncio.to_thread(uploader.upload_video, args.file_path, title, desc))
     else:
         print("⏭️  Vimeo upload disabled in config.")
+    
+    await asyncio.gather(*uploads)
         
     print(f"\n{'-'*60}")
     print("🏁 Upload process finished.")
     print(f"{'='*60}\n")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -1,6 +1,71 @@
 import os
+import asyncio
 import vimeo
 
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+VIMEO_API = "https://api.vimeo.com"
+TUS_CHUNK_SIZE = 5 * 1024 * 1024
+TUS_RETRIES = 3
+
+
+async def create_tus_video(session, access_token, file_path, data):
+    """Create the Vimeo video with a tus upload ticket; returns (uri, upload_link)"""
+    body = dict(data, upload={"approach": "tus", "size": os.path.getsize(file_path)})
+    headers = {
+        "Authorization": f"bearer {access_token}",
+        "Accept": "application/vnd.vimeo.*+json;version=3.4",
+    }
+    async with session.post(f"{VIMEO_API}/me/videos", json=body, headers=headers) as response:
+        response.raise_for_status()
+        video = await response.json()
+    return video["uri"], video["upload"]["upload_link"]
+
+
+async def tus_upload(session, file_path, upload_link, chunk_size=TUS_CHUNK_SIZE, retries=TUS_RETRIES):
+    """
+    PATCH the file to a tus upload_link chunk by chunk, reading only one chunk at a time.
+    A failed chunk (including one the server accepted without advancing the offset) asks
+    the server for its offset (HEAD) and resumes there instead of restarting the whole
+    file; more than `retries` failures in a row give up.
+    """
+    size = os.path.getsize(file_path)
+    tus = {"Tus-Resumable": "1.0.0"}
+    offset = 0
+    failures = 0
+    with open(file_path, 'rb') as f:
+        while offset < size:
+            f.seek(offset)
+            chunk = f.read(chunk_size)
+            headers = dict(tus, **{
+                "Upload-Offset": str(offset),
+                "Content-Type": "application/offset+octet-stream",
+            })
+            try:
+                async with session.patch(upload_link, data=chunk, headers=headers) as response:
+                    response.raise_for_status()
+                    new_offset = int(response.headers["Upload-Offset"])
+                if new_offset <= offset:
+                    raise ValueError(f"tus offset did not advance past {offset}")
+                offset = new_offset
+                failures = 0
+            except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError):
+                failures += 1
+                if failures > retries:
+                    raise
+                await asyncio.sleep(failures)
+                # Resume where the server says it is; if HEAD fails too, retry from here
+                try:
+                    async with session.head(upload_link, headers=tus) as response:
+                        offset = int(response.headers.get("Upload-Offset", offset))
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                    pass
+
+
 class VimeoUploader:
     def __init__(self, config):
         self.config = config
@@ -8,33 +73,61 @@ class VimeoUploader:
         self.client_id = config.get("client_id")
         self.client_secret = config.get("client_secret")
 
+    async def upload_video_async(self, session, file_path, title, description):
+        """Resumable tus upload on a shared aiohttp session (gather several to upload in parallel)"""
+        if not self.access_token or self.access_token == "YOUR_VIMEO_ACCESS_TOKEN":
+            print("⚠️ Vimeo access token not configured.")
+            return False
+
+        print(f"📤 Uploading to Vimeo: {title}...")
+
+        try:
+            uri, upload_link = await create_tus_video(session, self.access_token, file_path, {
+                'name': title,
+                'description': description
+            })
+            await tus_upload(session, file_path, upload_link)
+
+            print(f"✅ Vimeo Upload Complete! URI: {uri}")
+            return True
+
+        except Exception as e:
+            print(f"❌ Vimeo Upload Error: {e}")
+            return False
+
     def upload_video(self, file_path, title, description):
+        if AIOHTTP_AVAILABLE:
+            async def run():
+                async with aiohttp.ClientSession() as session:
+                    return await self.upload_video_async(session, file_path, title, description)
+            return asyncio.run(run())
+
         if not self.access_token or self.access_token == "YOUR_VIMEO_ACCESS_TOKEN":
             print("⚠️ Vimeo access token not configured.")
             return False
-            
+
         client = vimeo.VimeoClient(
             token=self.access_token,
             key=self.client_id,
             secret=self.client_secret
         )
-        
+
         print(f"📤 Uploading to Vimeo: {title}...")
-        
+
         try:
             uri = client.upload(file_path, data={
                 'name': title,
                 'description': description
             })
-            
+
             print(f"✅ Vimeo Upload Complete! URI: {uri}")
-            
+
             # Optional: Verify upload or get link
             # video_data = client.get(uri + '?fields=link').json()
             # print(f"   Link: {video_data.get('link')}")
-            
+
             return True
-            
+
         except Exception as e:
             print(f"❌ Vimeo Upload Error: {e}")
             return False
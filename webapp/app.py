@@ -292,15 +292,15 @@ def reset_gpus():
     print("🚨 ADMIN: Manual GPU Reset Triggered")
     print("="*80)
     
+    reset_count = 0
+    # Free all GPUs (release_gpu takes scheduler.lock itself)
+    for gpu_id in scheduler.gpu_config:
+        if scheduler.busy[gpu_id]:
+            print(f"   🟢 GPU {gpu_id}: busy → free")
+            scheduler.release_gpu(gpu_id)
+            reset_count += 1
+    
     with scheduler.lock:
-        reset_count = 0
-        # Free all GPUs
-        for gpu_id in scheduler.gpu_config:
-            if scheduler.gpu_config[gpu_id]["busy"]:
-                print(f"   🟢 GPU {gpu_id}: busy → free")
-                scheduler.gpu_config[gpu_id]["busy"] = False
-                reset_count += 1
-        
         # Mark stuck running tasks as failed
         failed_count = 0
         for task_id, task_data in scheduler.active_tasks.items():
@@ -9,23 +9,49 @@ import time
 import subprocess
 import os
 import threading
+import itertools
 from datetime import datetime
+from enum import Enum
 from queue import Queue
-from typing import Dict, Optional
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+UTIL_EMA_ALPHA = 0.1  # weight of the newest task's mean utilization
+
+
+class LoadBalancingStrategy(Enum):
+    """How new tasks are spread over GPUs"""
+    ROUND_ROBIN = "round_robin"        # rotate through the GPUs
+    SHORTEST_QUEUE = "shortest_queue"  # fewest pending tasks, lowest GPU ID on ties
+    ADAPTIVE = "adaptive"              # fewest pending tasks, lowest utilization EMA on ties
+
 
 class SimpleGPUScheduler:
-    def __init__(self):
+    def __init__(self, strategy: LoadBalancingStrategy = LoadBalancingStrategy.ADAPTIVE):
         # 1 task per GPU - simple!
         self.gpu_config = {
-            0: {"port": 8390, "busy": False},
-            1: {"port": 8391, "busy": False},
-            2: {"port": 8392, "busy": False}
+            0: {"port": 8390},
+            1: {"port": 8391},
+            2: {"port": 8392}
         }
-        self.task_queue = []  # FIFO queue
+        # Per-GPU scheduling state as flat lists indexed by GPU ID (read on every decision)
+        self.busy = [False] * len(self.gpu_config)
+        # One deque per GPU, each in arrival order. A freed GPU serves its own deque
+        # first and only steals from the longest other deque when its own is empty.
+        # Guarded by self.lock (peeking and popping must happen in one step)
+        self.worker_queues = [deque() for _ in self.gpu_config]
+        self._enqueue_seq = itertools.count()  # breaks queued_at ties in arrival order
         self.active_tasks = {}  # {task_id: {gpu_id, status, start_time}}
         self.pre_processing_tasks = {} # {task_id: "status_message"}
         self.completed_tasks = []
         self.lock = threading.Lock()
+        self.strategy = strategy
+        self.per_gpu_util_ema = [0.0] * len(self.gpu_config)  # mean GPU util % of recent tasks
+        # Round-robin positions: one for placing tasks, one for picking which idle GPU steals
+        self._enqueue_turns = itertools.count()
+        self._claim_turn = 0  # guarded by self.lock
+        # Bumped on every claim; a release carrying an older generation is stale
+        self._claim_gen = [0] * len(self.gpu_config)
 
     def get_gpu_memory(self, gpu_id: int) -> str:
         """Get current GPU memory usage via nvidia-smi (returns string '1234 MiB')"""
@@ -37,6 +63,18 @@ class SimpleGPUScheduler:
             return f"{result.stdout.strip()} MiB"
         except Exception:
             return "0 MiB"
+    
+    def _query_gpu(self, gpu_id: int) -> Tuple[int, int]:
+        """(memory used MiB, utilization %) from a single nvidia-smi call; (0, 0) on error"""
+        try:
+            result = subprocess.run(
+                ['nvidia-smi', '--query-gpu=memory.used,utilization.gpu', '--format=csv,noheader,nounits', '-i', str(gpu_id)],
+                capture_output=True, text=True
+            )
+            mem, util = result.stdout.split(',')
+            return int(mem), int(util)
+        except Exception:
+            return 0, 0
         
     def find_available_gpu(self) -> Optional[int]:
         """
@@ -45,17 +83,110 @@ class SimpleGPUScheduler:
         """
         with self.lock:
             for gpu_id in [0, 1, 2]:
-                if not self.gpu_config[gpu_id]["busy"]:
+                if not self.busy[gpu_id]:
                     return gpu_id
         return None
     
+    @property
+    def task_queue(self) -> List[Dict]:
+        """Snapshot of all queued tasks, oldest first (read-only; use enqueue to add)"""
+        tasks = [task for q in self.worker_queues for task in q.copy()]
+        return sorted(tasks, key=self._queue_order)
+    
+    @staticmethod
+    def _queue_order(task: Dict):
+        """Sort key: arrival time, then enqueue order"""
+        return task.get("queued_at", 0), task.get("_seq", 0)
+    
+    @property
+    def per_gpu_pending(self) -> List[int]:
+        """Queued plus running tasks per GPU"""
+        return [len(q) + busy for q, busy in zip(self.worker_queues, self.busy)]
+    
+    def _rank_gpus(self, gpu_ids: List[int], turn: int) -> List[int]:
+        """gpu_ids ordered best first under self.strategy (turn: round-robin position)"""
+        if self.strategy is LoadBalancingStrategy.ROUND_ROBIN:
+            # Rotate over every GPU, then drop the ones not offered
+            all_ids = list(self.gpu_config)
+            start = turn % len(all_ids)
+            return [g for g in all_ids[start:] + all_ids[:start] if g in gpu_ids]
+        pending = self.per_gpu_pending
+        if self.strategy is LoadBalancingStrategy.SHORTEST_QUEUE:
+            return sorted(gpu_ids, key=lambda g: (pending[g], g))
+        return sorted(gpu_ids, key=lambda g: (pending[g], self.per_gpu_util_ema[g]))
+    
+    def pick_gpu(self) -> int:
+        """GPU whose deque a new task should join (call with self.lock held)"""
+        return self._rank_gpus(list(self.gpu_config), next(self._enqueue_turns))[0]
+    
+    def update_util_ema(self, gpu_id: int, sample: float):
+        """Fold a finished task's mean utilization into the GPU's EMA"""
+        with self.lock:
+            ema = self.per_gpu_util_ema[gpu_id]
+            self.per_gpu_util_ema[gpu_id] = (1 - UTIL_EMA_ALPHA) * ema + UTIL_EMA_ALPHA * sample
+    
+    def enqueue(self, task: Dict):
+        """Queue a task on the deque of the GPU picked by the load-balancing strategy"""
+        task.setdefault("_seq", next(self._enqueue_seq))
+        with self.lock:
+            self.worker_queues[self.pick_gpu()].append(task)
+    
+    def _take_task(self, gpu_id: int) -> Optional[Dict]:
+        """
+        Next task for gpu_id (call with self.lock held): the head of its own deque,
+        else the tail of the longest other deque, or None if all are empty
+        """
+        own = self.worker_queues[gpu_id]
+        if own:
+            return own.popleft()
+        victim = max(self.worker_queues, key=len)
+        return victim.pop() if victim else None
+    
+    def claim_available_gpu(self) -> Optional[int]:
+        """Claim a free GPU and mark it busy; returns its ID or None if all busy"""
+        claimed = self._claim()
+        return claimed[0] if claimed else None
+    
+    def _claim(self) -> Optional[Tuple[int, int]]:
+        """
+        Claim a free GPU and mark it busy; returns (GPU ID, claim generation) or None.
+        Free GPUs with tasks on their own deque come first (oldest head first), so a task
+        runs on the GPU the strategy placed it on; the strategy ranks the rest for stealing.
+        """
+        with self.lock:
+            free = [gpu_id for gpu_id, busy in enumerate(self.busy) if not busy]
+            owners = sorted((g for g in free if self.worker_queues[g]),
+                            key=lambda g: self._queue_order(self.worker_queues[g][0]))
+            ranked = owners + [g for g in self._rank_gpus(free, self._claim_turn) if g not in owners]
+            if not ranked:
+                return None
+            gpu_id = ranked[0]
+            self.busy[gpu_id] = True
+            self._claim_turn += 1  # the rotation only moves on a claim
+            self._claim_gen[gpu_id] += 1
+            return gpu_id, self._claim_gen[gpu_id]
+    
+    def release_gpu(self, gpu_id: int, generation: Optional[int] = None) -> bool:
+        """
+        Mark GPU free; returns whether it was released.
+        With a generation, only if that claim still owns the GPU: after a manual reset
+        another dispatcher may have claimed it, and the old owner must not free it.
+        """
+        with self.lock:
+            if generation is not None and generation != self._claim_gen[gpu_id]:
+                return False
+            self.busy[gpu_id] = False
+            return True
+    
     def get_gpu_status(self) -> Dict:
         """Get status of all GPUs"""
+        # nvidia-smi runs outside the lock; only the bookkeeping reads hold it
+        memory = [self.get_gpu_memory(gpu_id) for gpu_id in [0, 1, 2]]
         with self.lock:
             return {
-                "gpu0": {"status": "busy" if self.gpu_config[0]["busy"] else "free", "memory": self.get_gpu_memory(0)},
-                "gpu1": {"status": "busy" if self.gpu_config[1]["busy"] else "free", "memory": self.get_gpu_memory(1)},
-                "gpu2": {"status": "busy" if self.gpu_config[2]["busy"] else "free", "memory": self.get_gpu_memory(2)},
+                "gpu0": {"status": "busy" if self.busy[0] else "free", "memory": memory[0]},
+                "gpu1": {"status": "busy" if self.busy[1] else "free", "memory": memory[1]},
+                "gpu2": {"status": "busy" if self.busy[2] else "free", "memory": memory[2]},
                 "queue_size": len(self.task_queue),
                 "active_tasks": len([t for t in self.active_tasks.values() if t["status"] == "running"]),
                 "completed": len(self.completed_tasks)
@@ -115,8 +246,9 @@ class SimpleGPUScheduler:
             traceback.print_exc()
             return False
     
-    def monitor_task(self, task_id: str, gpu_id: int, video_path: str, audio_path: str):
-        """Monitor task until completion with timeout and failure detection"""
+    def monitor_task(self, task_id: str, gpu_id: int, video_path: str, audio_path: str,
+                     generation: Optional[int] = None):
+        """Monitor task until completion with timeout and failure detection (generation: our GPU claim)"""
         port = self.gpu_config[gpu_id]["port"]
         # Output is written to /code/data/temp/ inside container -> ~/heygem_data/gpu{id}/temp/ on host
         output_file = os.path.expanduser(f"~/heygem_data/gpu{gpu_id}/temp/{task_id}-r.mp4")
@@ -131,6 +263,7 @@ class SimpleGPUScheduler:
         print(f"   Timeout: {MAX_WAIT_TIME}s")
         
         max_memory = 0 # Track peak usage
+        util_total, util_samples = 0, 0  # mean utilization feeds the load balancer
         last_api_check = 0
         
         while True:
@@ -140,11 +273,11 @@ class SimpleGPUScheduler:
             if elapsed > MAX_WAIT_TIME:
                 print(f"⏰ TIMEOUT: Task '{task_id}' exceeded {MAX_WAIT_TIME}s")
                 with self.lock:
-                    self.gpu_config[gpu_id]["busy"] = False
-                    print(f"🟢 GPU {gpu_id} FREED (timeout)")
                     self.active_tasks[task_id]["status"] = "failed"
                     self.active_tasks[task_id]["error"] = f"Timeout after {MAX_WAIT_TIME}s"
                     self.active_tasks[task_id]["elapsed"] = elapsed
+                self.release_gpu(gpu_id, generation)
+                print(f"🟢 GPU {gpu_id} FREED (timeout)")
                 self.process_next_in_queue()
                 return
             
@@ -168,11 +301,11 @@ class SimpleGPUScheduler:
                             print(f"   Error: {error_msg[:200]}")
                             
                             with self.lock:
-                                self.gpu_config[gpu_id]["busy"] = False
-                                print(f"🟢 GPU {gpu_id} FREED (task failed)")
                                 self.active_tasks[task_id]["status"] = "failed"
                                 self.active_tasks[task_id]["error"] = error_msg[:500]
                                 self.active_tasks[task_id]["elapsed"] = elapsed
+                            self.release_gpu(gpu_id, generation)
+                            print(f"🟢 GPU {gpu_id} FREED (task failed)")
                             
                             self.process_next_in_queue()
                             return
@@ -213,9 +346,9 @@ class SimpleGPUScheduler:
                     # Update status
                     # Use the peak memory observed during polling
                     final_mem = f"{max_memory} MiB (Peak)" if max_memory > 0 else "Unknown"
+                    if util_samples:
+                        self.update_util_ema(gpu_id, util_total / util_samples)
                     with self.lock:
-                        self.gpu_config[gpu_id]["busy"] = False
-                        print(f"🟢 GPU {gpu_id} FREED (completed)")
                         self.active_tasks[task_id]["status"] = "completed"
                         self.active_tasks[task_id]["elapsed"] = elapsed
                         self.active_tasks[task_id]["output"] = output_name
@@ -228,6 +361,8 @@ class SimpleGPUScheduler:
                             "gpu_memory_usage": final_mem,
                             "completed_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                         })
+                    self.release_gpu(gpu_id, generation)
+                    print(f"🟢 GPU {gpu_id} FREED (completed)")
                     
                     print(f"✅ '{task_id}' completed on GPU {gpu_id} ({elapsed/60:.1f} mins)")
                     
@@ -246,14 +381,12 @@ class SimpleGPUScheduler:
             
             # Polling Logic: Check usage every 2 seconds while waiting
             # Only if GPU is marked busy (which it is)
-            current_mem_str = self.get_gpu_memory(gpu_id)
-            try:
-                # Extract number from "1234 MiB"
-                mem_val = int(current_mem_str.split()[0])
-                if mem_val > max_memory:
-                    max_memory = mem_val
-            except:
-                pass
+            mem_val, util_val = self._query_gpu(gpu_id)
+            if mem_val > max_memory:
+                max_memory = mem_val
+            if mem_val:
+                util_total += util_val
+                util_samples += 1
 
             time.sleep(2)
     
@@ -272,8 +405,7 @@ class SimpleGPUScheduler:
             "queued_at": time.time()
         }
         
-        with self.lock:
-            self.task_queue.append(task)
+        self.enqueue(task)
         
         print(f"📝 Task added: {task_id} (Queue: {len(self.task_queue)})")
         
@@ -284,25 +416,22 @@ class SimpleGPUScheduler:
     
     def process_next_in_queue(self):
         """Process next task if GPU available"""
-        # CRITICAL FIX: Find GPU and mark it busy ATOMICALLY in one lock to prevent race conditions
+        if not any(self.worker_queues):
+            return  # Queue empty: don't claim (and advance the rotation) for nothing
+        
+        # Find GPU and mark it busy ATOMICALLY (one self.lock section)
+        claimed = self._claim()
+        if claimed is None:
+            return  # All GPUs busy
+        gpu_id, generation = claimed
+        
+        # Own deque first, then steal
         with self.lock:
-            if not self.task_queue:
-                return  # Queue empty
-            
-            # Find available GPU while holding the lock
-            gpu_id = None
-            for gid in [0, 1, 2]:
-                if not self.gpu_config[gid]["busy"]:
-                    gpu_id = gid
-                    break
-            
-            if gpu_id is None:
-                return  # All GPUs busy
-            
-            # Pop task and mark GPU as busy ATOMICALLY
-            task = self.task_queue.pop(0)  # FIFO
-            self.gpu_config[gpu_id]["busy"] = True
-            print(f"🔒 LOCKED: Assigned GPU {gpu_id} to task {task['task_id']}")
+            task = self._take_task(gpu_id)
+        if task is None:
+            self.release_gpu(gpu_id, generation)
+            return  # Queue empty
+        print(f"🔒 LOCKED: Assigned GPU {gpu_id} to task {task['task_id']}")
         
         task_id = task["task_id"]
         
@@ -318,7 +447,7 @@ class SimpleGPUScheduler:
             # Start monitoring in background
             monitor_thread = threading.Thread(
                 target=self.monitor_task,
-                args=(task_id, gpu_id, task["video_path"], task["audio_path"]),
+                args=(task_id, gpu_id, task["video_path"], task["audio_path"], generation),
                 daemon=True
             )
             monitor_thread.start()
@@ -337,8 +466,8 @@ class SimpleGPUScheduler:
         else:
             # Re-queue on failure and FREE GPU
             with self.lock:
-                self.task_queue.insert(0, task)
-                self.gpu_config[gpu_id]["busy"] = False
+                self.worker_queues[gpu_id].appendleft(task)
+            self.release_gpu(gpu_id, generation)
     
     def get_task_status(self, task_id: str) -> Dict:
         """Get status of specific task"""
@@ -367,9 +496,8 @@ class SimpleGPUScheduler:
                     }
             
             # Check if in queue
-            for task in self.task_queue:
+            for position, task in enumerate(self.task_queue, 1):
                 if task["task_id"] == task_id:
-                    position = self.task_queue.index(task) + 1
                     return {
                         "status": "queued",
                         "queue_position": position
@@ -396,8 +524,13 @@ class SimpleGPUScheduler:
                  del self.pre_processing_tasks[task_id]
 
 
+def make_scheduler() -> SimpleGPUScheduler:
+    """Fresh scheduler with its own state (tests build one instead of reloading this module)"""
+    return SimpleGPUScheduler()
+
+
 # Global scheduler instance
-scheduler = SimpleGPUScheduler()
+scheduler = make_scheduler()
 
 
 if __name__ == "__main__":
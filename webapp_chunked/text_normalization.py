@@ -10,6 +10,133 @@ Applied BEFORE sending text to Narakeet TTS API.
 
 import re
 
+# Patterns are compiled once at import; latex_to_speech runs on every TTS request
+_WHITESPACE = re.compile(r'\s+')
+_INLINE_MATH = re.compile(r'\$([^$]+)\$')
+
+# Plain-text math: unicode operators and Greek letters in one translate table
+_PLAIN_MATH_TABLE = str.maketrans({
+    '−': '-',       # Unicode minus -> standard hyphen
+    '±': ' plus or minus ',
+    '×': ' times ',
+    '÷': ' divided by ',
+    '≤': ' less than or equal to ',
+    '≥': ' greater than or equal to ',
+    '≠': ' not equal to ',
+    '≈': ' approximately ',
+    '≡': ' equivalent to ',
+    '∞': ' infinity ',
+    '∫': ' integral of ',
+    '√': ' square root of ',
+    'α': ' alpha ', 'β': ' beta ', 'γ': ' gamma ', 'δ': ' delta ', 'ε': ' epsilon ',
+    'θ': ' theta ', 'λ': ' lambda ', 'μ': ' mu ', 'π': ' pi ', 'σ': ' sigma ',
+    'ω': ' omega ', 'φ': ' phi ', 'ψ': ' psi ', 'ρ': ' rho ', 'τ': ' tau ',
+    'Δ': ' Delta ', 'Σ': ' Sigma ', 'Ω': ' Omega ',
+})
+_PLUS_BETWEEN = re.compile(r'([a-zA-Z0-9])\+([a-zA-Z0-9])')
+_MINUS_BETWEEN = re.compile(r'([a-zA-Z0-9])\-([a-zA-Z0-9])')
+_EQUALS_BETWEEN = re.compile(r'([a-zA-Z0-9])=([a-zA-Z0-9])')
+_EQUALS = re.compile(r'\s*=\s*')
+_PLUS = re.compile(r'\s*\+\s*')
+_SQUARED = re.compile(r'([a-zA-Z])2(?![0-9])')
+_CUBED = re.compile(r'([a-zA-Z])3(?![0-9])')
+_DYDX = re.compile(r'\bdydx\b')
+_DDX = re.compile(r'\bddx\b')
+
+_DIGIT_LETTER = re.compile(r'(\d)([a-zA-Z])')
+_NUMBER = re.compile(r'\d+')
+
+# LaTeX expressions
+_COMMON_FRACTIONS = {
+    ('1', '2'): 'one half',
+    ('1', '3'): 'one third',
+    ('2', '3'): 'two thirds',
+    ('1', '4'): 'one quarter',
+    ('3', '4'): 'three quarters',
+    ('1', '5'): 'one fifth',
+    ('1', '6'): 'one sixth',
+    ('1', '8'): 'one eighth',
+    ('1', '10'): 'one tenth',
+}
+_COMMON_FRACTION = re.compile(r'\\frac\s*\{(\d+)\}\s*\{(\d+)\}', re.IGNORECASE)
+_FRAC = re.compile(r'\\frac\s*\{([^}]+)\}\s*\{([^}]+)\}')
+_POWER_BRACED = re.compile(r'([a-zA-Z0-9]+)\s*\^\s*\{([^}]+)\}')
+_POWER_DIGIT = re.compile(r'([a-zA-Z0-9]+)\s*\^\s*([0-9])')
+_SQRT = re.compile(r'\\sqrt\s*\{([^}]+)\}')
+
+# Greek letters and math symbols as a single alternation, longest first so
+# e.g. \infty wins over \int and \therefore over \theta
+_LATEX_WORDS = {
+    '\\alpha': 'alpha',
+    '\\beta': 'beta',
+    '\\gamma': 'gamma',
+    '\\delta': 'delta',
+    '\\epsilon': 'epsilon',
+    '\\theta': 'theta',
+    '\\lambda': 'lambda',
+    '\\mu': 'mu',
+    '\\pi': 'pi',
+    '\\sigma': 'sigma',
+    '\\omega': 'omega',
+    '\\phi': 'phi',
+    '\\psi': 'psi',
+    '\\rho': 'rho',
+    '\\tau': 'tau',
+    '\\eta': 'eta',
+    '\\zeta': 'zeta',
+    '\\nu': 'nu',
+    '\\xi': 'xi',
+    '\\chi': 'chi',
+    '\\Delta': 'Delta',
+    '\\Sigma': 'Sigma',
+    '\\Pi': 'Pi',
+    '\\Omega': 'Omega',
+    '\\times': ' times ',
+    '\\cdot': ' times ',
+    '\\div': ' divided by ',
+    '\\pm': ' plus or minus ',
+    '\\mp': ' minus or plus ',
+    '\\leq': ' less than or equal to ',
+    '\\geq': ' greater than or equal to ',
+    '\\neq': ' not equal to ',
+    '\\approx': ' approximately ',
+    '\\equiv': ' is equivalent to ',
+    '\\infty': ' infinity ',
+    '\\sum': 'sum of ',
+    '\\prod': 'product of ',
+    '\\int': 'integral of ',
+    '\\partial': 'partial ',
+    '\\nabla': 'del ',
+    '\\rightarrow': ' goes to ',
+    '\\leftarrow': ' from ',
+    '\\Rightarrow': ' implies ',
+    '\\therefore': 'therefore ',
+    '\\degree': ' degrees',
+    '\\circ': ' degrees',
+}
+_LATEX_WORD = re.compile('|'.join(
+    re.escape(token) for token in sorted(_LATEX_WORDS, key=len, reverse=True)
+))
+_OPERATOR_TABLE = str.maketrans({
+    '=': ' equals ',
+    '+': ' plus ',
+    # Be careful with minus signs in text, but in latex mode it's okay
+    '-': ' minus ',
+    '*': ' times ',
+    '/': ' over ',
+    '<': ' less than ',
+    '>': ' greater than ',
+})
+_LATEX_COMMAND = re.compile(r'\\[a-zA-Z]+')
+_BRACES = re.compile(r'[{}]')
+
+# Leftover artifacts
+_DISPLAY_OPEN = re.compile(r'\\\[')
+_DISPLAY_CLOSE = re.compile(r'\\\]')
+_BEGIN_ENV = re.compile(r'\\begin\{[^}]+\}')
+_END_ENV = re.compile(r'\\end\{[^}]+\}')
+_COMMAND_WITH_ARG = re.compile(r'\\[a-zA-Z]+\s*\{([^}]*)\}')
+
 
 def latex_to_speech(text: str) -> str:
     """Convert LaTeX notation in text to speakable words.
@@ -38,7 +165,7 @@ def latex_to_speech(text: str) -> str:
     result = _handle_numbers(result)
 
     # 5. Collapse whitespace
-    result = re.sub(r'\s+', ' ', result).strip()
+    result = _WHITESPACE.sub(' ', result).strip()
     
     return result
 
@@ -51,7 +178,7 @@ def _convert_inline_math(text: str) -> str:
         return _latex_to_words(content)
     
     # Handles $equation$
-    result = re.sub(r'\$([^$]+)\$', replace_math, text)
+    result = _INLINE_MATH.sub(replace_math, text)
     return result
 
 
@@ -59,55 +186,30 @@ def _handle_plain_text_math(text: str) -> str:
     """Handle math that isn't wrapped in LaTeX delimiters."""
     result = text
     
-    # 0. Unicode Replacements (Crucial for copy-pasted math)
-    unicode_map = {
-        '−': '-',       # Unicode minus -> standard hyphen
-        '±': ' plus or minus ',
-        '×': ' times ',
-        '÷': ' divided by ',
-        '≤': ' less than or equal to ',
-        '≥': ' greater than or equal to ',
-        '≠': ' not equal to ',
-        '≈': ' approximately ',
-        '≡': ' equivalent to ',
-        '∞': ' infinity ',
-        '∫': ' integral of ',
-        '√': ' square root of '
-    }
-    for char, replacement in unicode_map.items():
-        result = result.replace(char, replacement)
-
-    # 1. Greek characters (Direct replacement)
-    greek_map = {
-        'α': 'alpha', 'β': 'beta', 'γ': 'gamma', 'δ': 'delta', 'ε': 'epsilon',
-        'θ': 'theta', 'λ': 'lambda', 'μ': 'mu', 'π': 'pi', 'σ': 'sigma',
-        'ω': 'omega', 'φ': 'phi', 'ψ': 'psi', 'ρ': 'rho', 'τ': 'tau',
-        'Δ': 'Delta', 'Σ': 'Sigma', 'Ω': 'Omega'
-    }
-    for char, name in greek_map.items():
-        result = result.replace(char, f" {name} ")
+    # 0-1. Unicode operators (crucial for copy-pasted math) and Greek characters
+    result = result.translate(_PLAIN_MATH_TABLE)
 
     # 2. Spacing around operators (for better TTS rhythm)
     # Ensure + and = have spaces if they are between alphanumeric chars
-    result = re.sub(r'([a-zA-Z0-9])\+([a-zA-Z0-9])', r'\1 plus \2', result)
-    result = re.sub(r'([a-zA-Z0-9])\-([a-zA-Z0-9])', r'\1 minus \2', result)
-    result = re.sub(r'([a-zA-Z0-9])=([a-zA-Z0-9])', r'\1 equals \2', result)
+    result = _PLUS_BETWEEN.sub(r'\1 plus \2', result)
+    result = _MINUS_BETWEEN.sub(r'\1 minus \2', result)
+    result = _EQUALS_BETWEEN.sub(r'\1 equals \2', result)
     
     # Generic cleanup for standalone operators
-    result = re.sub(r'\s*=\s*', ' equals ', result)
-    result = re.sub(r'\s*\+\s*', ' plus ', result)
+    result = _EQUALS.sub(' equals ', result)
+    result = _PLUS.sub(' plus ', result)
     # Don't replace hyphen in words (like "plus-minus"), only strict math context if possible
     # But for safety in this math-heavy context, we can be aggressive with isolated hyphens
     
     # 3. Powers (Relaxed matching)
     # Handle x2, a2, b2 inside longer strings (like ax2)
     # Logic: Letter followed by 2, not followed by other numbers
-    result = re.sub(r'([a-zA-Z])2(?![0-9])', r'\1 squared', result)
-    result = re.sub(r'([a-zA-Z])3(?![0-9])', r'\1 cubed', result)
+    result = _SQUARED.sub(r'\1 squared', result)
+    result = _CUBED.sub(r'\1 cubed', result)
 
     # 4. Calculus Notation
-    result = re.sub(r'\bdydx\b', 'dy by dx', result)
-    result = re.sub(r'\bddx\b', 'd by dx', result)
+    result = _DYDX.sub('dy by dx', result)
+    result = _DDX.sub('d by dx', result)
     
     return result
 
@@ -122,12 +224,12 @@ def _handle_numbers(text: str) -> str:
     # This prevents "twox" output which sounds wrong.
     # Note: We don't separate letter-digit (x2) because that was handled by power logic earlier,
     # and if any remain like 'v2', 'v two' is acceptable.
-    text = re.sub(r'(\d)([a-zA-Z])', r'\1 \2', text)
+    text = _DIGIT_LETTER.sub(r'\1 \2', text)
 
     # Replace ALL numbers (even inside words like 2x -> two x)
     # Note: We must be careful not to break latex commands if any remain, 
     # but at this stage most should be gone or processed.
-    return re.sub(r'\d+', num_replacer, text)
+    return _NUMBER.sub(num_replacer, text)
 
 
 def _num2words(n: int) -> str:
@@ -151,20 +253,10 @@ def _latex_to_words(latex: str) -> str:
     """Convert a LaTeX expression to spoken words."""
     result = latex.strip()
     
-    common_fractions = {
-        r'\\frac\s*\{1\}\s*\{2\}': 'one half',
-        r'\\frac\s*\{1\}\s*\{3\}': 'one third',
-        r'\\frac\s*\{2\}\s*\{3\}': 'two thirds',
-        r'\\frac\s*\{1\}\s*\{4\}': 'one quarter',
-        r'\\frac\s*\{3\}\s*\{4\}': 'three quarters',
-        r'\\frac\s*\{1\}\s*\{5\}': 'one fifth',
-        r'\\frac\s*\{1\}\s*\{6\}': 'one sixth',
-        r'\\frac\s*\{1\}\s*\{8\}': 'one eighth',
-        r'\\frac\s*\{1\}\s*\{10\}': 'one tenth',
-    }
+    def common_frac(match):
+        return _COMMON_FRACTIONS.get((match.group(1), match.group(2)), match.group(0))
     
-    for pattern, replacement in common_fractions.items():
-        result = re.sub(pattern, replacement, result, flags=re.IGNORECASE)
+    result = _COMMON_FRACTION.sub(common_frac, result)
     
     def general_frac(match):
         num = match.group(1).strip()
@@ -173,7 +265,7 @@ def _latex_to_words(latex: str) -> str:
         denom_spoken = _latex_to_words(denom)
         return f"{num_spoken} over {denom_spoken}"
     
-    result = re.sub(r'\\frac\s*\{([^}]+)\}\s*\{([^}]+)\}', general_frac, result)
+    result = _FRAC.sub(general_frac, result)
     
     power_words = {
         '2': 'squared',
@@ -191,89 +283,26 @@ def _latex_to_words(latex: str) -> str:
             return f"{base_spoken} to the power of {exp_spoken}"
     
     # Matches x^{2} and x^2
-    result = re.sub(r'([a-zA-Z0-9]+)\s*\^\s*\{([^}]+)\}', power_replace, result)
-    result = re.sub(r'([a-zA-Z0-9]+)\s*\^\s*([0-9])', power_replace, result)
+    result = _POWER_BRACED.sub(power_replace, result)
+    result = _POWER_DIGIT.sub(power_replace, result)
     
     def sqrt_replace(match):
         content = match.group(1).strip()
         content_spoken = _latex_to_words(content) if '\\' in content else content
         return f"square root of {content_spoken}"
     
-    result = re.sub(r'\\sqrt\s*\{([^}]+)\}', sqrt_replace, result)
-    
-    greek_letters = [
-        ('\\alpha', 'alpha'),
-        ('\\beta', 'beta'),
-        ('\\gamma', 'gamma'),
-        ('\\delta', 'delta'),
-        ('\\epsilon', 'epsilon'),
-        ('\\theta', 'theta'),
-        ('\\lambda', 'lambda'),
-        ('\\mu', 'mu'),
-        ('\\pi', 'pi'),
-        ('\\sigma', 'sigma'),
-        ('\\omega', 'omega'),
-        ('\\phi', 'phi'),
-        ('\\psi', 'psi'),
-        ('\\rho', 'rho'),
-        ('\\tau', 'tau'),
-        ('\\eta', 'eta'),
-        ('\\zeta', 'zeta'),
-        ('\\nu', 'nu'),
-        ('\\xi', 'xi'),
-        ('\\chi', 'chi'),
-        ('\\Delta', 'Delta'),
-        ('\\Sigma', 'Sigma'),
-        ('\\Pi', 'Pi'),
-        ('\\Omega', 'Omega'),
-    ]
-    
-    for pattern, replacement in greek_letters:
-        result = result.replace(pattern, replacement)
-    
-    math_symbols = [
-        ('\\times', ' times '),
-        ('\\cdot', ' times '),
-        ('\\div', ' divided by '),
-        ('\\pm', ' plus or minus '),
-        ('\\mp', ' minus or plus '),
-        ('\\leq', ' less than or equal to '),
-        ('\\geq', ' greater than or equal to '),
-        ('\\neq', ' not equal to '),
-        ('\\approx', ' approximately '),
-        ('\\equiv', ' is equivalent to '),
-        ('\\infty', ' infinity '),
-        ('\\sum', 'sum of '),
-        ('\\prod', 'product of '),
-        ('\\int', 'integral of '),
-        ('\\partial', 'partial '),
-        ('\\nabla', 'del '),
-        ('\\rightarrow', ' goes to '),
-        ('\\leftarrow', ' from '),
-        ('\\Rightarrow', ' implies '),
-        ('\\therefore', 'therefore '),
-        ('\\degree', ' degrees'),
-        ('\\circ', ' degrees'),
-    ]
-    
-    for pattern, replacement in math_symbols:
-        result = result.replace(pattern, replacement)
+    result = _SQRT.sub(sqrt_replace, result)
+    
+    result = _LATEX_WORD.sub(lambda match: _LATEX_WORDS[match.group(0)], result)
     
     # Basic operators
-    result = re.sub(r'=', ' equals ', result)
-    result = re.sub(r'\+', ' plus ', result)
-    # Be careful with minus signs in text, but in latex mode it's okay
-    result = re.sub(r'-', ' minus ', result)
-    result = re.sub(r'\*', ' times ', result)
-    result = re.sub(r'/', ' over ', result)
-    result = re.sub(r'<', ' less than ', result)
-    result = re.sub(r'>', ' greater than ', result)
+    result = result.translate(_OPERATOR_TABLE)
     
     # Clean up stray latex commands
-    result = re.sub(r'\\[a-zA-Z]+', '', result)
+    result = _LATEX_COMMAND.sub('', result)
     
     # Remove braces
-    result = re.sub(r'[{}]', '', result)
+    result = _BRACES.sub('', result)
     
     return result.strip()
 
@@ -281,17 +310,17 @@ def _latex_to_words(latex: str) -> str:
 def _clean_remaining_latex(text: str) -> str:
     """Clean up any remaining LaTeX artifacts that weren't caught."""
     
-    text = re.sub(r'\\\[', '', text)
-    text = re.sub(r'\\\]', '', text)
-    text = re.sub(r'\\begin\{[^}]+\}', '', text)
-    text = re.sub(r'\\end\{[^}]+\}', '', text)
+    text = _DISPLAY_OPEN.sub('', text)
+    text = _DISPLAY_CLOSE.sub('', text)
+    text = _BEGIN_ENV.sub('', text)
+    text = _END_ENV.sub('', text)
     
     # Remove arguments like \textbf{...} but keep content
-    text = re.sub(r'\\[a-zA-Z]+\s*\{([^}]*)\}', r'\1', text)
+    text = _COMMAND_WITH_ARG.sub(r'\1', text)
     
     # Remove standalone commands
-    text = re.sub(r'\\[a-zA-Z]+', '', text)
+    text = _LATEX_COMMAND.sub('', text)
     
-    text = re.sub(r'[{}]', '', text)
+    text = _BRACES.sub('', text)
     
     return text